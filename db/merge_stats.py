@@ -1,90 +1,193 @@
 import os
+import sys
 import json
 import re
 import signal
+import hashlib
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
-main_directory = "../research" 
-output_file = "../research/merged_stats.json"
+# readers / writers for the output codecs of the parsers (json, zstd, msgpack)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "parsers"))
+from common import rc_codec as rcCodec
+
+main_directory = "../research"
+output_base = "../research/merged_stats"  # extension is added by the codec
+manifest_file = "../research/merged_stats.manifest.json"  # id -> file, mtime, size and digest of the merged exposition
 pid_file = "flask_server.pid"  # <-- PID file to send SIGUSR1 to
 
-merged_data = {}
-
-for folder_name in os.listdir(main_directory):
-    folder_path = os.path.join(main_directory, folder_name)
-
-    if os.path.isdir(folder_path) and folder_name.isdigit():
-        json_file = os.path.join(folder_path, f"{folder_name}.json")
-
-        if os.path.exists(json_file):
-            try:
-                with open(json_file, "r", encoding="utf-8") as file:
-                    data = json.load(file)
-
-                    pages = data.get("pages", {})
-                    number_of_pages = len(pages)
-
-                    result_entry = {
-                        "number-of-pages": number_of_pages,
-                        "default-page-type": None,
-                        "default-page": None,
-                        "tool-counts": defaultdict(int),
-                        "link-counts": defaultdict(int),
-                        "total-number-of-tools": 0
-                    }
-
-                    default_page_url = data.get("url", "")
-                    result_entry["default-page"] = default_page_url
-
-                    parts = default_page_url.rstrip("/").split("/")
-                    if len(parts) >= 6:
-                        default_page_id = parts[5]
-
-                        if default_page_id in pages:
-                            default_page_data = pages[default_page_id]
-                            result_entry["default-page-type"] = default_page_data.get("type", None)
-
-                            if result_entry["default-page-type"] == "weave-graphical":
-                                metrics = default_page_data.get("metrics", {})
-                                if metrics:
-                                    result_entry["metrics"] = metrics
-
-                    for page_data in pages.values():
-                        tools = page_data.get("tools", {})
-                        for tool_type, tool_list in tools.items():
-                            tool_count = len(tool_list)
-                            result_entry["tool-counts"][tool_type] += tool_count
-                            result_entry["total-number-of-tools"] += tool_count
-                            
-                        links = page_data.get("hyperlinks", {})
-                        for link_type, link_list in links.items():
-                            link_count = len(link_list)
-                            result_entry["link-counts"][link_type] += link_count
-
-                    result_entry["tool-counts"] = dict(result_entry["tool-counts"])
-                    result_entry["link-counts"] = dict(result_entry["link-counts"])
-
-                    merged_data[folder_name] = result_entry
-
-            except json.JSONDecodeError as e:
-                print(f"Error decoding JSON in {json_file}: {e}")
-            except Exception as e:
-                print(f"Unexpected error processing {json_file}: {e}")
-
-with open(output_file, "w", encoding="utf-8") as outfile:
-    json.dump(merged_data, outfile, indent=4)
-
-print(f"Processed {len(merged_data)} JSON files into {output_file}.")
-
-# 🔔 Send SIGUSR1 to Flask server
-try:
-    with open(pid_file, "r") as f:
-        pid = int(f.read().strip())
-    os.kill(pid, signal.SIGUSR1)
-    print(f"Sent SIGUSR1 to Flask server (PID {pid}) to reload data.")
-except FileNotFoundError:
-    print(f"PID file '{pid_file}' not found. Flask server may not be running.")
-except ProcessLookupError:
-    print(f"No process found with PID {pid}.")
-except Exception as e:
-    print(f"Failed to send signal: {e}")
+
+def load_previous():
+    """Manifest and merged entries of the last run, empty when either is missing."""
+    try:
+        with open(manifest_file, "r") as file:
+            manifest = json.load(file)
+        merged = rcCodec.load(rcCodec.find(output_base))
+    except (FileNotFoundError, TypeError, ValueError):
+        return {}, {}
+    return manifest, merged
+
+
+def exposition_entry(data):
+    """Merged stats entry of one exposition."""
+    pages = data.get("pages", {})
+    number_of_pages = len(pages)
+
+    result_entry = {
+        "number-of-pages": number_of_pages,
+        "default-page-type": None,
+        "default-page": None,
+        "tool-counts": defaultdict(int),
+        "link-counts": defaultdict(int),
+        "total-number-of-tools": 0
+    }
+
+    default_page_url = data.get("url", "")
+    result_entry["default-page"] = default_page_url
+
+    parts = default_page_url.rstrip("/").split("/")
+    if len(parts) >= 6:
+        default_page_id = parts[5]
+
+        if default_page_id in pages:
+            default_page_data = pages[default_page_id]
+            result_entry["default-page-type"] = default_page_data.get("type", None)
+
+            if result_entry["default-page-type"] == "weave-graphical":
+                metrics = default_page_data.get("metrics", {})
+                if metrics:
+                    result_entry["metrics"] = metrics
+
+    for page_data in pages.values():
+        tools = page_data.get("tools", {})
+        for tool_type, tool_list in tools.items():
+            tool_count = len(tool_list)
+            result_entry["tool-counts"][tool_type] += tool_count
+            result_entry["total-number-of-tools"] += tool_count
+
+        links = page_data.get("hyperlinks", {})
+        for link_type, link_list in links.items():
+            link_count = len(link_list)
+            result_entry["link-counts"][link_type] += link_count
+
+    result_entry["tool-counts"] = dict(result_entry["tool-counts"])
+    result_entry["link-counts"] = dict(result_entry["link-counts"])
+    return result_entry
+
+
+def read_exposition(job):
+    """
+    Pool worker: digest the exposition file and decode it if the digest differs
+    from the known one. The file is read once, digest and decoding use the same
+    bytes. Returns (folder name, digest, entry, error), entry is None when the
+    content is unchanged.
+    """
+    folder_name, json_file, known_digest = job
+    try:
+        with open(json_file, "rb") as file:
+            raw = file.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == known_digest:
+            return folder_name, digest, None, None
+        return folder_name, digest, exposition_entry(rcCodec.loads(raw, rcCodec.codec_of(json_file))), None
+    except ValueError as e:
+        return folder_name, None, None, f"Error decoding {json_file}: {e}"
+    except Exception as e:
+        return folder_name, None, None, f"Unexpected error processing {json_file}: {e}"
+
+
+def merge(full=False, workers=None, codec="json"):
+    """
+    Merge all expositions into merged_stats. Only expositions whose file
+    changed since the last run (by mtime and size, then by digest) are read
+    again; the others keep their entry. Returns the number of changes, 0 when
+    merged_stats is unchanged.
+    """
+    manifest, previous = ({}, {}) if full else load_previous()
+    new_manifest = {}
+    merged_data = {}
+    records = {}
+    jobs = []
+    changes = 0
+
+    for folder_name in os.listdir(main_directory):
+        folder_path = os.path.join(main_directory, folder_name)
+
+        if os.path.isdir(folder_path) and folder_name.isdigit():
+            json_file = rcCodec.find(os.path.join(folder_path, folder_name))
+
+            if json_file:
+                stat = os.stat(json_file)
+                record = {"file": os.path.basename(json_file), "mtime": stat.st_mtime_ns, "size": stat.st_size}
+                known = manifest.get(folder_name, {})
+                if folder_name in previous and all(known.get(key) == value for key, value in record.items()):
+                    new_manifest[folder_name] = known
+                    merged_data[folder_name] = previous[folder_name]
+                    continue
+                records[folder_name] = record
+                # a touched file with the same content keeps its entry, see read_exposition
+                jobs.append((folder_name, json_file, known.get("digest") if folder_name in previous else None))
+
+    # decoding is the expensive part, spread it over all cores
+    if len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(read_exposition, jobs, chunksize=8))
+    else:
+        results = [read_exposition(job) for job in jobs]
+
+    for folder_name, digest, entry, error in results:
+        if error:
+            print(error)
+            continue
+        merged_data[folder_name] = entry if entry is not None else previous[folder_name]
+        changes += entry is not None
+        new_manifest[folder_name] = {**records[folder_name], "digest": digest}
+
+    # expositions that are gone, or could not be read anymore
+    changes += len(set(previous) - set(merged_data))
+
+    if changes or rcCodec.find(output_base) is None:
+        output_file = rcCodec.dump(merged_data, output_base, codec)
+        print(f"Merged {changes} new, changed or removed expositions, {len(merged_data)} in total, into {output_file}.")
+    else:
+        print(f"No changes in {len(merged_data)} expositions.")
+
+    # the manifest last: if the run is interrupted before, the next run redoes the work
+    with open(manifest_file + ".tmp", "w") as file:
+        json.dump(new_manifest, file)
+    os.replace(manifest_file + ".tmp", manifest_file)
+    return changes
+
+
+def notify_server():
+    # 🔔 Send SIGUSR1 to Flask server
+    try:
+        with open(pid_file, "r") as f:
+            pid = int(f.read().strip())
+        os.kill(pid, signal.SIGUSR1)
+        print(f"Sent SIGUSR1 to Flask server (PID {pid}) to reload data.")
+    except FileNotFoundError:
+        print(f"PID file '{pid_file}' not found. Flask server may not be running.")
+    except ProcessLookupError:
+        print(f"No process found with PID {pid}.")
+    except Exception as e:
+        print(f"Failed to send signal: {e}")
+
+
+if __name__ == "__main__":
+    # python3 merge_stats.py [codec] [--full] [--workers=N]
+    workers = None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--workers="):
+            workers = int(arg.split("=", 1)[1])
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    codec = args[0] if args else "json"
+    if codec not in rcCodec.CODECS:
+        print(f"Error: codec must be one of: {', '.join(rcCodec.CODECS)}")
+        sys.exit(1)
+    # a different codec than last time means a full write anyway
+    previous_file = rcCodec.find(output_base)
+    codec_changed = previous_file is not None and rcCodec.codec_of(previous_file) != codec
+
+    if merge(full="--full" in sys.argv or codec_changed, workers=workers, codec=codec):
+        notify_server()
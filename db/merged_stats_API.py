@@ -1,9 +1,13 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-import json
 import signal
 import threading
 import os
+import sys
+
+# readers for the output codecs of the parsers (json, zstd, msgpack)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "parsers"))
+from common import rc_codec as rcCodec
 
 app = Flask(__name__)
 trusted_origins = [
@@ -14,24 +18,101 @@ trusted_origins = [
 ]
 CORS(app, origins=trusted_origins)
 
-file_url = "../research/merged_stats.json"
+file_base = "../research/merged_stats"  # merged_stats.json, .json.zst or .msgpack
+
+TOOL_TYPES = {
+    "tool-video", "tool-audio", "tool-picture", "tool-slideshow",
+    "tool-pdf", "tool-text", "tool-simpletext", "tool-shape"
+}
+# tool-text ranks text and simpletext tools together
+TOOL_GROUPS = {tool: [tool] for tool in TOOL_TYPES}
+TOOL_GROUPS["tool-text"] = ["tool-text", "tool-simpletext"]
+
+LINK_TYPES = {
+    "same_exposition", "other_expositions", "references", "external"
+}
+
+METRICS = {
+    "alignment_score",
+    "horizontal_vertical_ratio",
+    "overall_regular_score",
+    "overlap_percentage",
+    "size_uniformity_score",
+    "spacing_score",
+    "white_space_percentage"
+}
+
+GENERAL_KEYS = ("total-number-of-tools", "number-of-pages")
+
+def load_stats():
+    file_url = rcCodec.find(file_base)
+    if file_url is None:
+        raise FileNotFoundError(f"{file_base}.json not found")
+    return rcCodec.load(file_url)
+
+# Ranking indexes, built once per (re)load. sorted() is stable, so entries with
+# equal keys keep their merged_stats order and splitting a ranking by page type
+# gives the same order as filtering first.
+def ranked(rows, key):
+    return sorted(rows, key=key, reverse=True)
+
+def by_page_type(rows):
+    """Rows grouped by default page type, None holds all of them."""
+    groups = {None: rows}
+    for row in rows:
+        page_type = row.get("default-page-type")
+        if page_type is not None:
+            groups.setdefault(page_type, []).append(row)
+    return groups
+
+def tool_count(tools):
+    return lambda row: sum(row["tool-counts"].get(tool, 0) for tool in tools)
+
+def link_count(link_type):
+    return lambda row: row["link-counts"].get(link_type, 0)
+
+def metric_value(metric_key):
+    return lambda row: row.get("metrics", {}).get(metric_key, float("-inf"))
+
+def general_value(sort_key):
+    return lambda row: row.get(sort_key, 0)
+
+def build_indexes(data):
+    rows = [{"id": k, **v} for k, v in data.items()]
+    graphical = [row for row in rows if row.get("default-page-type") == "weave-graphical"]
+    return {
+        "page-types": by_page_type(rows),
+        "tools": {tool: by_page_type(ranked(rows, tool_count(tools))) for tool, tools in TOOL_GROUPS.items()},
+        "links": {link_type: ranked(rows, link_count(link_type)) for link_type in LINK_TYPES},
+        "metrics": {
+            metric_key: ranked(
+                [row for row in graphical if row.get("metrics", {}).get(metric_key) not in {0.0, 1.0}],
+                metric_value(metric_key)
+            )
+            for metric_key in METRICS
+        },
+        "general": {sort_key: by_page_type(ranked(rows, general_value(sort_key))) for sort_key in GENERAL_KEYS},
+    }
 
+# Load initial data
+data = load_stats()
+indexes = build_indexes(data)
 data_lock = threading.Lock()
-data = {}
 
-# Load initial data
-with open(file_url, "r", encoding="utf-8") as file:
-    data = json.load(file)
+def snapshot():
+    """Data and indexes of the same load."""
+    with data_lock:
+        return data, indexes
 
 def reload_data(signum=None, frame=None):
-    global data
-    print("Reloading merged_stats.json due to signal...")
+    global data, indexes
+    print("Reloading merged_stats due to signal...")
     try:
-        with open(file_url, "r", encoding="utf-8") as file:
-            new_data = json.load(file)
+        new_data = load_stats()
+        new_indexes = build_indexes(new_data)
+        # requests keep answering from the old data until both are swapped
         with data_lock:
-            data.clear()
-            data.update(new_data)
+            data, indexes = new_data, new_indexes
         print("Data reloaded successfully.")
     except Exception as e:
         print(f"Failed to reload data: {e}")
@@ -40,69 +121,16 @@ signal.signal(signal.SIGUSR1, reload_data)
 
 # Utility functions
 def get_top_tools(tool_type, n, page_type=None):
-    if isinstance(tool_type, str):
-        tool_type = [tool_type]
-
-    with data_lock:
-        filtered_entries = {
-            k: v for k, v in data.items() if page_type is None or v.get("default-page-type") == page_type
-        }
-
-        sorted_entries = sorted(
-            filtered_entries.items(),
-            key=lambda x: sum(x[1]["tool-counts"].get(tool, 0) for tool in tool_type),
-            reverse=True
-        )
-
-        return [{"id": entry[0], **entry[1]} for entry in sorted_entries[:n]]
+    return snapshot()[1]["tools"][tool_type].get(page_type, [])[:n]
 
 def get_top_links(link_type, n):
-    if isinstance(link_type, str):
-        link_type = [link_type]
-
-    with data_lock:
-        filtered_entries = {k: v for k, v in data.items()}
-
-        sorted_entries = sorted(
-            filtered_entries.items(),
-            key=lambda x: sum(x[1]["link-counts"].get(tool, 0) for tool in link_type),
-            reverse=True
-        )
-
-        return [{"id": entry[0], **entry[1]} for entry in sorted_entries[:n]]
+    return snapshot()[1]["links"][link_type][:n]
 
 def get_top_graphical_entries(metric_key, n):
-    with data_lock:
-        filtered_entries = {
-            k: v for k, v in data.items() if v.get("default-page-type") == "weave-graphical"
-        }
-
-        filtered_entries = {
-            k: v for k, v in filtered_entries.items()
-            if v.get("metrics", {}).get(metric_key) not in {0.0, 1.0}
-        }
-
-        sorted_entries = sorted(
-            filtered_entries.items(),
-            key=lambda x: x[1].get("metrics", {}).get(metric_key, float("-inf")),
-            reverse=True
-        )
-
-        return [{"id": entry[0], **entry[1]} for entry in sorted_entries[:n]]
+    return snapshot()[1]["metrics"][metric_key][:n]
 
 def get_top_general(sort_key, n, page_type=None):
-    with data_lock:
-        filtered_entries = {
-            k: v for k, v in data.items() if page_type is None or v.get("default-page-type") == page_type
-        }
-
-        sorted_entries = sorted(
-            filtered_entries.items(),
-            key=lambda x: x[1].get(sort_key, 0),
-            reverse=True
-        )
-
-        return [{"id": entry[0], **entry[1]} for entry in sorted_entries[:n]]
+    return snapshot()[1]["general"][sort_key].get(page_type, [])[:n]
 
 # Routes
 @app.route("/highest-total-tools", methods=["GET"])
@@ -123,16 +151,8 @@ def sort_by_tool():
     n = int(request.args.get("n", 50))
     page_type = request.args.get("page_type")
 
-    valid_tools = {
-        "tool-video", "tool-audio", "tool-picture", "tool-slideshow",
-        "tool-pdf", "tool-text", "tool-simpletext", "tool-shape"
-    }
-
-    if not tool_type or tool_type not in valid_tools:
-        return jsonify({"error": f"Invalid or missing tool type. Choose from: {', '.join(valid_tools)}"}), 400
-
-    if tool_type == "tool-text":
-        tool_type = ["tool-text", "tool-simpletext"]
+    if not tool_type or tool_type not in TOOL_TYPES:
+        return jsonify({"error": f"Invalid or missing tool type. Choose from: {', '.join(TOOL_TYPES)}"}), 400
 
     return jsonify(get_top_tools(tool_type, n, page_type))
 
@@ -141,12 +161,8 @@ def sort_by_link():
     link_type = request.args.get("link_type")
     n = int(request.args.get("n", 50))
 
-    valid_links = {
-        "same_exposition", "other_expositions", "references", "external"
-    }
-
-    if not link_type or link_type not in valid_links:
-        return jsonify({"error": f"Invalid or missing link type. Choose from: {', '.join(valid_links)}"}), 400
+    if not link_type or link_type not in LINK_TYPES:
+        return jsonify({"error": f"Invalid or missing link type. Choose from: {', '.join(LINK_TYPES)}"}), 400
 
     return jsonify(get_top_links(link_type, n))
 
@@ -155,18 +171,8 @@ def sort_by_graphical_metric():
     metric_key = request.args.get("metric")
     n = int(request.args.get("n", 50))
 
-    valid_metrics = {
-        "alignment_score",
-        "horizontal_vertical_ratio",
-        "overall_regular_score",
-        "overlap_percentage",
-        "size_uniformity_score",
-        "spacing_score",
-        "white_space_percentage"
-    }
-
-    if not metric_key or metric_key not in valid_metrics:
-        return jsonify({"error": f"Invalid or missing metric. Choose from: {', '.join(valid_metrics)}"}), 400
+    if not metric_key or metric_key not in METRICS:
+        return jsonify({"error": f"Invalid or missing metric. Choose from: {', '.join(METRICS)}"}), 400
 
     return jsonify(get_top_graphical_entries(metric_key, n))
 
@@ -176,21 +182,15 @@ def filter_by_page_type():
     if not page_type:
         return jsonify({"error": "Missing 'page_type' parameter"}), 400
 
-    with data_lock:
-        filtered_entries = {
-            k: v for k, v in data.items() if v.get("default-page-type") == page_type
-        }
-
-        return jsonify([{"id": k, **v} for k, v in filtered_entries.items()])
+    return jsonify(snapshot()[1]["page-types"].get(page_type, []))
 
 @app.route("/exposition/<string:exposition_id>", methods=["GET"])
 def get_exposition_by_id(exposition_id):
-    with data_lock:
-        exposition = data.get(exposition_id)
-        if exposition:
-            return jsonify({"id": exposition_id, **exposition})
-        else:
-            return jsonify({"error": "Exposition not found"}), 404
+    exposition = snapshot()[0].get(exposition_id)
+    if exposition:
+        return jsonify({"id": exposition_id, **exposition})
+    else:
+        return jsonify({"error": "Exposition not found"}), 404
 
 PID_FILE = "flask_server.pid"
 
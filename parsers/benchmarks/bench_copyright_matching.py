@@ -0,0 +1,75 @@
+# benchmark: copyright-to-tool matching, nested scan over all copyrights vs the tool id index
+# usage (from parsers/): python3 -m benchmarks.bench_copyright_matching [number_of_tools]
+# that both give the same exposition is checked in tests/test_insert_copyrights.py
+from contextlib import redirect_stdout
+from media.rc_merge_data import insert_copyrights
+import copy
+import io
+import random
+import sys
+import time
+
+CATEGORIES = ("tool-picture", "tool-text", "tool-video", "tool-slideshow", "tool-pdf")
+
+
+def exposition(number_of_tools, tools_per_page=200):
+    pages = {}
+    for start in range(0, number_of_tools, tools_per_page):
+        tools = {}
+        for i in range(start, min(start + tools_per_page, number_of_tools)):
+            tools.setdefault(random.choice(CATEGORIES), []).append({"id": f"tool-{i}", "src": f"/media/{i}.jpg"})
+        pages[str(start // tools_per_page)] = {"tools": tools}
+    return pages
+
+
+def copyrights(number_of_tools, usages_per_media=3):
+    """One copyright row per media, each media used by a few random tools."""
+    ids = [f"tool-{i}" for i in range(number_of_tools)]
+    random.shuffle(ids)
+    rows = []
+    for start in range(0, len(ids), usages_per_media):
+        usage = ids[start:start + usages_per_media]
+        rows.append({
+            "id": usage,
+            "tool": [f"https://www.researchcatalogue.net/view/1/2#{tool_id}" for tool_id in usage],
+            "copyright": f"author {start}",
+            "license": "all-rights-reserved",
+        })
+    return rows
+
+
+# the nested scan that insert_copyrights used before, without downloads
+def legacy_insert(copyrights, exposition):
+    for page_id, page_data in exposition.items():
+        for tool_category, tools_list in page_data.get("tools", {}).items():
+            for tool in tools_list:
+                tool_id = tool["id"]
+                for media in copyrights:
+                    if isinstance(media["id"], list) and tool_id in media["id"]:
+                        index = media["id"].index(tool_id)
+                        tool.update(media)
+                        tool["id"] = tool_id
+                        tool["tool"] = media["tool"][index]
+    return exposition
+
+
+def timed(fn, rows, pages, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        pages_copy = copy.deepcopy(pages)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            result = fn(rows, pages_copy)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [100, 1000, 5000]
+    for size in sizes:
+        pages, rows = exposition(size), copyrights(size)
+        legacy_time, _ = timed(legacy_insert, rows, pages)
+        index_time, _ = timed(lambda rows, pages: insert_copyrights(rows, pages, None, None, download=False), rows, pages)
+        print(f"{size:6} tools, {len(rows):5} copyright rows: nested scan {legacy_time:.3f}s, "
+              f"index {index_time:.3f}s, speedup {legacy_time / index_time:.1f}x")
@@ -0,0 +1,66 @@
+# benchmark: pairwise overlap (python double loop vs sorted numpy sweep) and union coverage on synthetic weaves
+# usage (from parsers/): python3 -m benchmarks.bench_metrics [number_of_tools]
+# that the results agree with the old formulas is checked in tests/test_metrics.py
+from metrics.calc_metrics import (
+    calculate_intersection, calculate_total_area, calculate_total_overlap, calculate_white_space,
+)
+import random
+import sys
+import time
+
+# the python double loop is quadratic, larger layouts are only timed with the sweep
+LEGACY_LIMIT = 5000
+
+
+def scattered_layout(number_of_tools, canvas=20000):
+    """Tools placed at random, many of them overlapping."""
+    return [
+        [random.randint(0, canvas), random.randint(0, canvas), random.randint(50, 800), random.randint(50, 600)]
+        for _ in range(number_of_tools)
+    ]
+
+
+def grid_layout(number_of_tools, per_row=50, cell=300, gap=20):
+    """Tools on a grid without any overlap."""
+    return [
+        [(i % per_row) * (cell + gap), (i // per_row) * (cell + gap), cell, cell]
+        for i in range(number_of_tools)
+    ]
+
+
+# the double loop that calculate_total_overlap used before
+def legacy_overlap(rectangles):
+    overlap_area = 0
+    for i in range(len(rectangles)):
+        for j in range(i + 1, len(rectangles)):
+            overlap_area += calculate_intersection(rectangles[i], rectangles[j])
+    return overlap_area
+
+
+# the white space before, without union: canvas minus the summed tool areas
+def legacy_white_space(rectangles):
+    max_x = max(x + w for x, y, w, h in rectangles)
+    max_y = max(y + h for x, y, w, h in rectangles)
+    return (max_x * max_y - calculate_total_area(rectangles)) / (max_x * max_y) * 100
+
+
+def timed(fn, rectangles):
+    start = time.perf_counter()
+    result = fn(rectangles)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [1000, 5000, 20000]
+    for size in sizes:
+        for name, rectangles in (("scattered", scattered_layout(size)), ("grid", grid_layout(size))):
+            sweep_time, _ = timed(calculate_total_overlap, rectangles)
+            line = f"{name:9} {size:6} tools: overlap sweep {sweep_time:.3f}s"
+            if size <= LEGACY_LIMIT:
+                legacy_time, _ = timed(legacy_overlap, rectangles)
+                line += f", double loop {legacy_time:.3f}s, speedup {legacy_time / sweep_time:.0f}x"
+
+            union_time, white_space = timed(calculate_white_space, rectangles)
+            line += f"; union white space {union_time:.3f}s ({white_space:.1f}%)"
+            print(line)
@@ -0,0 +1,88 @@
+# benchmark: per-type tool extraction (one find_all per tool type) vs single-pass extraction
+# usage (from parsers/): python3 -m benchmarks.bench_tool_extraction [number_of_tools]
+# that both give the same tools is checked in tests/test_tool_extraction.py
+from bs4 import BeautifulSoup
+from contextlib import redirect_stdout
+from expo import rc_soup_parsers as rcParsers
+from expo.rc_soup_tools import ALLTOOLS, TEXTTOOLS, getTexts, getTools, getBlockTools
+import io
+import random
+import sys
+import time
+
+
+def tool_html(which, index):
+    if which in TEXTTOOLS:
+        content = f"<p>Text {index} with <b>markup</b></p><style>p {{color: red}}</style>"
+    elif which == "tool-slideshow":
+        content = "".join(f'<img src="/resources/generate/{index:032x}/{i}/100">' for i in range(3))
+    elif which in ("tool-audio", "tool-video"):
+        content = f'<div data-file="https://media.researchcatalogue.net/{index}.mp4" data-image="poster.jpg"></div>'
+    else:
+        content = f'<img src="/resources/generate/{index:032x}/200/100">'
+    style = f"left: {random.randint(0, 5000)}px; top: {random.randint(0, 5000)}px; width: 200px; height: 100px;"
+    return (
+        f'<div class="tool {which}" style="{style}" data-last-modified-by="author" '
+        f'data-last-modified-at="2024-01-01T10:00:00+00:00"><a id="tool-{index}"></a>'
+        f'<div class="tool-content">{content}</div></div>'
+    )
+
+
+def graphical_page(number_of_tools):
+    tools = "".join(tool_html(random.choice(ALLTOOLS), i) for i in range(number_of_tools))
+    return f'<html class="weave-graphical"><body><div id="container-weave"><div id="weave">{tools}</div></div></body></html>'
+
+
+def block_page(number_of_tools, per_row=4):
+    rows = []
+    for start in range(0, number_of_tools, per_row):
+        cells = "".join(
+            f'<div class="col cell-3">{tool_html(random.choice(ALLTOOLS), i)}</div>'
+            for i in range(start, min(start + per_row, number_of_tools))
+        )
+        rows.append(f'<div class="row">{cells}</div>')
+    return f'<html class="weave-block"><body><div id="container-weave">{"".join(rows)}</div></body></html>'
+
+
+# the per-type extraction that parse_graphical / parse_block used before
+def legacy_graphical(parsed):
+    tool_entries = {}
+    for tool in ALLTOOLS:
+        fn = getTexts if tool in TEXTTOOLS else getTools
+        if (elements := fn(parsed, tool)):
+            tool_entries[tool] = elements
+    return tool_entries
+
+
+def legacy_block(parsed):
+    tool_entries = {}
+    for tool in ALLTOOLS:
+        fn = getTexts if tool in TEXTTOOLS else getBlockTools
+        if (elements := fn(parsed, tool)):
+            tool_entries[tool] = elements
+    return tool_entries
+
+
+def timed(fn, parsed, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            result = fn(parsed)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [100, 1000, 5000]
+    for size in sizes:
+        for name, page, legacy, single in (
+            ("graphical", graphical_page(size), legacy_graphical, rcParsers.parse_graphical),
+            ("block", block_page(size), legacy_block, rcParsers.parse_block),
+        ):
+            parsed = BeautifulSoup(page, "html.parser")
+            legacy_time, _ = timed(legacy, parsed)
+            single_time, _ = timed(single, parsed)
+            print(f"{name:9} {size:6} tools: per-type {legacy_time:.3f}s, single-pass {single_time:.3f}s, "
+                  f"speedup {legacy_time / single_time:.1f}x")
@@ -0,0 +1,65 @@
+# content-addressed, gzip compressed storage for the raw html of tools
+import hashlib
+import gzip
+import os
+
+# tool fields that hold raw html; stored as "<field>-blob": sha256 in the json
+BLOB_FIELDS = ("tool", "content")
+
+BLOB_FOLDER = "blobs"
+
+
+def blob_folder(exposition_folder):
+    return os.path.join(exposition_folder, BLOB_FOLDER)
+
+
+def write_blob(folder, html):
+    """Store html once under its sha256 and return the digest."""
+    digest = hashlib.sha256(html.encode("utf-8")).hexdigest()
+    path = os.path.join(folder, digest[:2], f"{digest}.gz")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8") as file:
+            file.write(html)
+        os.replace(path + ".tmp", path)
+    return digest
+
+
+def read_blob(folder, digest):
+    with gzip.open(os.path.join(folder, digest[:2], f"{digest}.gz"), "rt", encoding="utf-8") as file:
+        return file.read()
+
+
+def iter_tools(exp_dict):
+    for page in exp_dict.get("pages", {}).values():
+        for tools in page.get("tools", {}).values():
+            yield from tools
+
+
+def store_tool_html(exp_dict, folder):
+    """Move the raw html of every tool into the blob store, keeping only digests in exp_dict."""
+    for tool in iter_tools(exp_dict):
+        for field in BLOB_FIELDS:
+            html = tool.get(field)
+            # insert_copyrights replaces "tool" with the usage url, only html is stored
+            if isinstance(html, str) and html.startswith("<"):
+                tool[f"{field}-blob"] = write_blob(folder, html)
+                del tool[field]
+    return exp_dict
+
+
+def load_tool_html(tool, folder):
+    """Return a copy of tool with the html fields read back from the blob store."""
+    tool = dict(tool)
+    for field in BLOB_FIELDS:
+        if (digest := tool.pop(f"{field}-blob", None)):
+            tool[field] = read_blob(folder, digest)
+    return tool
+
+
+def rehydrate(exp_dict, folder):
+    """Read the html of every tool in exp_dict back from the blob store, in place."""
+    for page in exp_dict.get("pages", {}).values():
+        for tool_type, tools in page.get("tools", {}).items():
+            tools[:] = [load_tool_html(tool, folder) for tool in tools]
+    return exp_dict
@@ -0,0 +1,116 @@
+# on-disk http cache for RC sessions, revalidated with If-None-Match / If-Modified-Since
+from common.rc_client import RCClient
+from requests.models import PreparedRequest
+from requests.structures import CaseInsensitiveDict
+import requests
+import hashlib
+import json
+import time
+import os
+
+# only documents are cached, media downloads always go to the network
+CACHED_TYPES = ("text/", "application/json", "application/xhtml+xml")
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class CachedSession(RCClient):
+    """
+    RCClient that stores GET responses on disk, keyed by url.
+
+    Entries younger than ttl seconds are served without touching the network,
+    older entries are revalidated with a conditional request. A request with
+    the header "Cache-Control: no-store" bypasses the cache completely.
+    Authenticated sessions use their own namespace so restricted pages are
+    never served to anonymous sessions and vice versa.
+    """
+
+    def __init__(self, cache_dir, ttl=0, namespace="", **client_options):
+        super().__init__(**client_options)
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.namespace = namespace
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_path(self, url):
+        key = hashlib.sha256(f"{self.namespace}|{url}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def load(self, url):
+        path = self.entry_path(url)
+        try:
+            with open(path + ".json", "r") as file:
+                entry = json.load(file)
+            with open(path + ".body", "rb") as file:
+                entry["body"] = file.read()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return entry
+
+    def store(self, url, response):
+        path = self.entry_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "url": url,
+            "final-url": response.url,
+            "status": response.status_code,
+            "encoding": response.encoding,
+            "headers": {k: response.headers[k] for k in STORED_HEADERS if k in response.headers},
+            "stored": time.time(),
+        }
+        # body first, so a readable .json always has a complete .body
+        with open(path + ".body.tmp", "wb") as file:
+            file.write(response.content)
+        os.replace(path + ".body.tmp", path + ".body")
+        self.touch(url, entry)
+
+    def touch(self, url, entry):
+        path = self.entry_path(url)
+        entry = {k: v for k, v in entry.items() if k != "body"}
+        entry["stored"] = time.time()
+        with open(path + ".json.tmp", "w") as file:
+            json.dump(entry, file)
+        os.replace(path + ".json.tmp", path + ".json")
+
+    def build_response(self, entry):
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = entry["encoding"]
+        response.url = entry["final-url"]
+        response._content = entry["body"]
+        response.reason = "OK"
+        return response
+
+    def request(self, method, url, params=None, headers=None, **kwargs):
+        no_store = "no-store" in (headers or {}).get("Cache-Control", "")
+        if method.upper() != "GET" or no_store or kwargs.get("stream"):
+            return super().request(method, url, params=params, headers=headers, **kwargs)
+
+        prepared = PreparedRequest()
+        prepared.prepare_url(url, params)
+        key = prepared.url
+
+        entry = self.load(key)
+        if entry and time.time() - entry["stored"] < self.ttl:
+            self.count("cache hit")
+            return self.build_response(entry)
+
+        if entry:
+            headers = dict(headers or {})
+            if "ETag" in entry["headers"]:
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if "Last-Modified" in entry["headers"]:
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+
+        response = super().request(method, url, params=params, headers=headers, **kwargs)
+
+        if entry and response.status_code == 304:
+            self.count("cache revalidated")
+            self.touch(key, entry)
+            return self.build_response(entry)
+
+        self.count("cache miss")
+        content_type = response.headers.get("Content-Type", "")
+        if response.status_code == 200 and content_type.startswith(CACHED_TYPES):
+            self.store(key, response)
+        return response
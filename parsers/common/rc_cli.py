@@ -0,0 +1,125 @@
+# command line options shared by parse_rc.py and parse_expo.py, given as --name value or --name=value
+from common.rc_codec import CODECS
+from common.rc_html import PARSERS
+from common.rc_options import RCOptions
+import os
+
+
+class UsageError(ValueError):
+    """Unknown option or a value that does not convert; the entry scripts print their usage."""
+
+
+def choice(values):
+    def convert(value):
+        if value not in values:
+            raise ValueError(f"choose from: {', '.join(values)}")
+        return value
+    return convert
+
+
+def switch(value):
+    return int(value) != 0
+
+
+# what the plain converters expect, for the error message
+EXPECTED = {int: "an integer", float: "a number", switch: "0 or 1"}
+
+# option -> converter of its value; the entry scripts add their own options
+CRAWL_FLAGS = {
+    "--page-workers": int,
+    "--cache-dir": str,
+    "--cache-ttl": int,
+    "--parser": choice(PARSERS),
+    "--partial": switch,
+    "--blobs": switch,
+    "--codec": choice(CODECS),
+    "--retries": int,
+    "--rate": float,
+    "--max-media-size": float,
+    "--media-workers": int,
+    "--media-store": str,
+    "--browsers": int,
+    "--browser-recycle": int,
+    "--resize-workers": int,
+    "--webp": switch,
+}
+
+
+def parse_flags(argv, flags):
+    """
+    Split argv into ({option: converted value}, positional arguments).
+    Options that are not given are None. Raises UsageError for unknown
+    options, missing values and values that do not convert.
+    """
+    values = dict.fromkeys(flags)
+    args = []
+    argv = iter(argv)
+    for arg in argv:
+        if not arg.startswith("--"):
+            args.append(arg)
+            continue
+        name, has_value, value = arg.partition("=")
+        if name not in flags:
+            raise UsageError(f"unknown option {name}")
+        if not has_value:
+            value = next(argv, None)
+            if value is None:
+                raise UsageError(f"{name} needs a value")
+        try:
+            values[name] = flags[name](value.strip('"'))
+        except ValueError as e:
+            expected = EXPECTED.get(flags[name])
+            raise UsageError(f"invalid value {value!r} for {name}, " + (f"expected {expected}" if expected else str(e)))
+    return values, args
+
+
+def crawl_options(values, research_folder, download=False, workers=1):
+    """
+    RCOptions of a crawl from the values of CRAWL_FLAGS, printing the shared
+    folders it uses. Raises UsageError for options that do not go together.
+    """
+    defaults = RCOptions()
+
+    def value(name, default):
+        return default if values[name] is None else values[name]
+
+    media_store = None
+    if download and values["--media-store"] != "none":
+        media_store = os.path.abspath(values["--media-store"] or os.path.join(research_folder, ".media_store"))
+        print(f"Using media store: {media_store}")
+
+    cache_dir = values["--cache-dir"]
+    if cache_dir or values["--cache-ttl"] is not None:
+        cache_dir = os.path.abspath(cache_dir or os.path.join(research_folder, ".http_cache"))
+        print(f"Using http cache: {cache_dir}")
+
+    parser = value("--parser", defaults.parser)
+    partial = value("--partial", defaults.partial)
+    if partial and parser == "html5lib":
+        raise UsageError("--partial 1 does not work with --parser html5lib, which always builds the full tree")
+
+    page_workers = value("--page-workers", defaults.page_workers)
+    media_workers = value("--media-workers", defaults.media_workers)
+    rate = values["--rate"]
+    max_media_size = values["--max-media-size"]
+    return RCOptions(
+        cache_dir=cache_dir,
+        cache_ttl=value("--cache-ttl", defaults.cache_ttl),
+        # a session is shared by the page and media threads of an exposition
+        pool_size=max(defaults.pool_size, page_workers, media_workers),
+        retries=value("--retries", defaults.retries),
+        # the rate limit is for the whole run, every worker process gets its share
+        rate=rate / max(workers, 1) if rate else None,
+        page_workers=page_workers,
+        parser=parser,
+        partial=partial,
+        codec=value("--codec", defaults.codec),
+        blobs=value("--blobs", defaults.blobs),
+        max_media_size=int(max_media_size * 1024 * 1024) if max_media_size else None,
+        media_workers=media_workers,
+        media_store=media_store,
+        browsers=value("--browsers", defaults.browsers),
+        browser_recycle=value("--browser-recycle", defaults.browser_recycle),
+        resize_workers=value("--resize-workers", defaults.resize_workers),
+        webp=value("--webp", defaults.webp),
+    )
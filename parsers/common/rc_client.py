@@ -0,0 +1,93 @@
+# shared http client: sized connection pools, retries with backoff, rate limiting and per-host stats
+from collections import Counter
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from urllib3.util.retry import Retry
+import requests
+import threading
+import time
+
+# transient statuses, retried with exponential backoff (Retry-After is honoured)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: on average rate requests per second, with bursts
+    of up to burst requests. acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class RCClient(requests.Session):
+    """
+    requests.Session with sized connection pools, retries on transient errors
+    and an optional rate limit.
+
+    pool_size: connections kept per host, should be at least the number of
+    threads sharing the session (see --page-workers).
+    retries / backoff: a failed connection or a 429/5xx response is retried up
+    to retries times, waiting backoff * 2^n seconds in between.
+    rate: requests per second for this client (None for no limit).
+
+    Every request that goes to the network is counted per host in stats,
+    together with the time it took; see print_stats in rc_session.
+    """
+
+    def __init__(self, pool_size=10, retries=3, backoff=0.5, rate=None):
+        super().__init__()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,  # the login POST is safe to repeat as well
+            raise_on_status=False,
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.bucket = TokenBucket(rate) if rate else None
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def count(self, key, value=1):
+        with self.lock:
+            self.stats[key] += value
+
+    def send(self, request, **kwargs):
+        # redirects are sent through here as well, so every hop is limited and counted
+        if self.bucket:
+            self.bucket.acquire()
+        host = urlparse(request.url).netloc
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except requests.RequestException:
+            self.count(f"host {host} failed")
+            raise
+        finally:
+            self.count(f"host {host} requests")
+            self.count(f"host {host} seconds", time.perf_counter() - start)
+        retries = getattr(response.raw, "retries", None)
+        if retries and retries.history:
+            self.count(f"host {host} retries", len(retries.history))
+        if response.status_code >= 400:
+            self.count(f"host {host} status {response.status_code}")
+        return response
@@ -0,0 +1,89 @@
+# output codecs for exposition jsons, rc_dict and merged stats: plain json, zstd compressed json or msgpack
+import json
+import os
+
+# codec name -> file extension
+CODECS = {
+    "json": ".json",
+    "zstd": ".json.zst",
+    "msgpack": ".msgpack",
+}
+
+def codec_of(path):
+    for codec, extension in sorted(CODECS.items(), key=lambda item: -len(item[1])):
+        if path.endswith(extension):
+            return codec
+    raise ValueError(f"No codec for {path}")
+
+
+def string_keys(obj):
+    """Stringify dict keys like json does, so all codecs load the same data."""
+    if isinstance(obj, dict):
+        return {str(key): string_keys(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [string_keys(value) for value in obj]
+    return obj
+
+
+def dump(obj, base_path, codec="json"):
+    """
+    Write obj to base_path plus the extension of the codec and return the path.
+    Files of other codecs with the same base path are removed, so readers never
+    pick up an outdated variant.
+    """
+    path = base_path + CODECS[codec]
+    tmp_path = path + ".tmp"
+
+    if codec == "json":
+        with open(tmp_path, "w") as outfile:
+            json.dump(obj, outfile, indent=2)
+    elif codec == "zstd":
+        import zstandard
+        data = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+        with open(tmp_path, "wb") as outfile:
+            outfile.write(zstandard.ZstdCompressor(level=10).compress(data))
+    elif codec == "msgpack":
+        import msgpack
+        with open(tmp_path, "wb") as outfile:
+            outfile.write(msgpack.packb(string_keys(obj)))
+    os.replace(tmp_path, path)
+
+    for other in CODECS.values():
+        if base_path + other != path and os.path.exists(base_path + other):
+            os.remove(base_path + other)
+    return path
+
+
+def parse_json(data):
+    """json.loads, with orjson when it is installed (several times faster on large files)."""
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(data)
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson is strict, e.g. about the Infinity json.dump writes for some metrics
+        return json.loads(data)
+
+
+def loads(data, codec):
+    """Decode the bytes of a file written with codec."""
+    if codec == "json":
+        return parse_json(data)
+    if codec == "zstd":
+        import zstandard
+        return parse_json(zstandard.ZstdDecompressor().decompress(data))
+    import msgpack
+    return msgpack.unpackb(data)
+
+
+def load(path):
+    with open(path, "rb") as file:
+        return loads(file.read(), codec_of(path))
+
+
+def find(base_path):
+    """Existing file for base_path in any codec (the most recent one), or None."""
+    paths = [base_path + extension for extension in CODECS.values() if os.path.exists(base_path + extension)]
+    return max(paths, key=os.path.getmtime) if paths else None
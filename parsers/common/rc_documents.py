@@ -0,0 +1,46 @@
+# per-exposition document context: every url is fetched and parsed only once
+from bs4 import SoupStrainer
+from common.rc_html import make_soup, backend, AnyOf
+from common.rc_options import RCOptions
+
+# regions of the meta page read by parse_meta_page, extract_copyrights and getPages
+META_PAGE_REGIONS = AnyOf(
+    SoupStrainer("h2", class_="meta-headline"),
+    SoupStrainer(class_="meta-right-col"),
+    SoupStrainer(class_="meta-media-preview"),
+    SoupStrainer(class_="simple-media-copyright"),
+    SoupStrainer("a", href=True),
+)
+
+
+class DocumentContext:
+    """
+    Fetch-once cache of responses and parsed trees for a single exposition.
+
+    The meta page is needed by parse_meta_page, extract_copyrights and
+    getAllPages; with a shared context it is requested once and parsed once
+    per backend. parse_meta_page and getAllPages read the tree of
+    options.parser, extract_copyrights asks for a repairing backend (see
+    make_soup), which fixes the copyright tables. With the default html.parser
+    that is a second, html5lib tree; with lxml all consumers read the same
+    tree. With partial parsing enabled (options.partial) only
+    META_PAGE_REGIONS end up in the tree.
+    """
+
+    def __init__(self, session, options=RCOptions()):
+        self.session = session
+        self.options = options
+        self.responses = {}
+        self.soups = {}
+
+    def get(self, url):
+        if url not in self.responses:
+            self.responses[url] = self.session.get(url)
+        return self.responses[url]
+
+    def soup(self, url, repair=False):
+        key = (url, backend(self.options.parser, repair))
+        if key not in self.soups:
+            parse_only = META_PAGE_REGIONS if self.options.partial else None
+            self.soups[key] = make_soup(self.get(url).content, repair=repair, parser=self.options.parser, parse_only=parse_only)
+        return self.soups[key]
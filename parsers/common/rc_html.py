@@ -0,0 +1,42 @@
+# central html parser factory, the backend is chosen per call (see RCOptions.parser)
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+PARSERS = ("html.parser", "lxml", "html5lib")
+
+class AnyOf(SoupStrainer):
+    """Strainer that keeps every region matched by any of the given strainers."""
+
+    def __init__(self, *strainers):
+        super().__init__()
+        self.strainers = strainers
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return any(strainer.allow_tag_creation(nsprefix, name, attrs) for strainer in self.strainers)
+
+    def allow_string_creation(self, string):
+        return False
+
+
+def backend(parser, repair=False):
+    """The backend make_soup uses for parser: html.parser does not repair broken markup, html5lib does."""
+    return "html5lib" if repair and parser == "html.parser" else parser
+
+
+def make_soup(markup, repair=False, parser="html.parser", parse_only=None):
+    """
+    Parse markup with the parser backend.
+
+    repair: the document needs a parser that fixes broken markup the way
+    browsers do (the copyright tables on meta pages). html.parser does not,
+    so html5lib is used instead of it; lxml and html5lib are used as they are.
+    parse_only: SoupStrainer, only the matching regions are parsed into the
+    tree (html5lib ignores it and builds the full tree).
+    """
+    parser = backend(parser, repair)
+    if parser == "html5lib":
+        parse_only = None
+    try:
+        return BeautifulSoup(markup, parser, parse_only=parse_only)
+    except FeatureNotFound as e:
+        print(f"{parser} parser not available: {e}, using html.parser instead")
+        return BeautifulSoup(markup, "html.parser", parse_only=parse_only)
@@ -1,7 +1,7 @@
 # tools to parse hyperlinks in RC expositions and to locate subpages
 from expo import rc_soup_pages as expoParsers
+from common.rc_session import new_session
 from pathlib import Path
-import requests
 import json
 import os
 import time
@@ -12,11 +12,12 @@ JSONURL = "https://map.rcdata.org/internal_research.json"
 number_of_days = 3
 
 
-def getInternalResearch(path="../research", resume=False):
+def getInternalResearch(path="../research", resume=False, session=None):
     os.makedirs(path, exist_ok=True)
 
     # --- download internal research JSON ---
-    response = requests.get(JSONURL)
+    response = (session or new_session()).get(JSONURL)
+    response.raise_for_status()
     data = response.json()
     internal_file = os.path.join(path, "internal_research.json")
     with open(internal_file, "w") as json_file:
@@ -0,0 +1,52 @@
+# options of a crawl, built once by the entry scripts and passed down to sessions, parsers, writers, downloads and screenshots
+from dataclasses import dataclass
+from common.rc_codec import CODECS
+from common.rc_html import PARSERS
+
+
+@dataclass(frozen=True)
+class RCOptions:
+    """
+    Everything a crawl is configured with besides the positional flags.
+
+    The object is immutable and picklable: parse_expo.main hands it to the
+    modules that need it, and parse_rc passes it to every pool worker.
+    """
+
+    # http sessions (see rc_session.new_session)
+    cache_dir: str = None      # on-disk http cache, disabled when None
+    cache_ttl: int = 0         # seconds a cached response is served without revalidation
+    pool_size: int = 10        # connections per host, at least the number of threads sharing a session
+    retries: int = 3           # retries of failed connections and 429/5xx responses
+    backoff: float = 0.5       # seconds, doubled with every retry
+    rate: float = None         # requests per second per session, unlimited when None
+    page_workers: int = 4      # pages of an exposition fetched concurrently
+
+    # html parsing (see rc_html.make_soup)
+    parser: str = "html.parser"
+    partial: bool = False      # parse only the regions the extraction needs (see AnyOf and parsePage)
+
+    # output (see rc_codec.dump and rc_blobs)
+    codec: str = "json"
+    blobs: bool = False        # raw tool html goes to the blob store, only digests stay inline
+
+    # media downloads (see rc_merge_data.download_media)
+    max_media_size: int = None        # bytes, larger files are skipped; no limit when None
+    media_attempts: int = 3           # a broken transfer is resumed this many times
+    media_timeout: tuple = (10, 60)   # seconds to connect / between two chunks
+    media_workers: int = 4            # concurrent downloads per exposition
+    media_store: str = None           # cross-exposition media store (see rc_media_store), disabled when None
+
+    # screenshots (see screenshot.get_browser_pool)
+    browsers: int = 1          # browsers per process, the pages of an exposition are captured at once
+    browser_recycle: int = 50  # captures before a browser is replaced by a fresh one
+    resize_workers: int = 2    # processes encoding the resized / compressed images, 0 encodes on the crawl thread
+    webp: bool = False         # also write compressed_{num}.webp
+
+    def __post_init__(self):
+        if self.parser not in PARSERS:
+            raise ValueError(f"Unknown parser {self.parser}. Choose from: {', '.join(PARSERS)}")
+        if self.codec not in CODECS:
+            raise ValueError(f"Unknown codec {self.codec}. Choose from: {', '.join(CODECS)}")
+        if self.partial and self.parser == "html5lib":
+            raise ValueError("Partial parsing does not work with html5lib, which always builds the full tree")
@@ -1,5 +1,9 @@
 import requests
-from bs4 import BeautifulSoup
+from collections import Counter
+from common.rc_html import make_soup
+from common.rc_cache import CachedSession
+from common.rc_client import RCClient
+from common.rc_options import RCOptions
 
 headers = {
     "User-Agent": (
@@ -19,30 +23,74 @@ headers = {
 
 login_url = "https://www.researchcatalogue.net/auth/login"
 
-def rc_session(username, password):
+CLIENT_OPTIONS = ("pool_size", "retries", "backoff", "rate")
+
+def new_session(options=RCOptions(), namespace=""):
+    """
+    Return an unauthenticated RCClient with the default RC headers, pooling,
+    retries and rate limit of options. When options.cache_dir is set the
+    session caches its responses on disk.
+    """
+    client_options = {key: getattr(options, key) for key in CLIENT_OPTIONS}
+    if options.cache_dir:
+        session = CachedSession(options.cache_dir, options.cache_ttl, namespace, **client_options)
+    else:
+        session = RCClient(**client_options)
+    session.headers.update(headers)
+    return session
+
+def pop_stats(session):
+    """Return the counters collected by a session and reset them."""
+    stats = Counter(getattr(session, "stats", {}))
+    if hasattr(session, "stats"):
+        session.stats.clear()
+    return stats
+
+def print_stats(stats):
+    """Print cache counters and, per host, the number of requests, their mean latency and errors."""
+    if not stats:
+        return
+    print("Request stats:")
+    hosts = {}
+    for key, value in sorted(stats.items()):
+        if key.startswith("host "):
+            host, _, counter = key[5:].partition(" ")
+            hosts.setdefault(host, {})[counter] = value
+        else:
+            print(f"  {key}: {value}")
+    for host, counters in hosts.items():
+        requests_sent = counters.pop("requests", 0)
+        seconds = counters.pop("seconds", 0.0)
+        mean = seconds / requests_sent * 1000 if requests_sent else 0.0
+        line = f"  {host}: {requests_sent} requests, {mean:.0f} ms mean, {seconds:.1f} s total"
+        for counter, value in sorted(counters.items()):
+            line += f", {value} {counter}"
+        print(line)
+
+def rc_session(username, password, options=RCOptions()):
     """
     Authenticate with Research Catalogue and return an authenticated session.
     
     Args:
         username: User email
         password: User password
+        options: RCOptions of the session (cache, pooling, retries, rate)
         
     Returns:
         Authenticated requests.Session object or None if login failed
     """
-    session = requests.Session()
-    session.headers.update(headers)
+    session = new_session(options, namespace=username)
     
-    # First, fetch the login page to extract CSRF token
+    # First, fetch the login page to extract CSRF token (never cached, the token is per session)
     try:
-        login_page = session.get(login_url)
+        login_page = session.get(login_url, headers={"Cache-Control": "no-store"})
         login_page.raise_for_status()
     except requests.RequestException as e:
         print(f"Failed to fetch login page: {e}")
         return None
     
     # Extract CSRF token from the login page
-    soup = BeautifulSoup(login_page.text, 'html.parser')
+    soup = make_soup(login_page.text)
     csrf_input = soup.find('input', {'name': '_csrf_token'})
     
     if not csrf_input:
@@ -0,0 +1,118 @@
+# append-only record log for parsed expositions, compacted into rc_dict.json / rc_advanced.json on demand
+from common import rc_codec as rcCodec
+from contextlib import contextmanager
+import json
+import os
+import sys
+
+
+def log_path(dict_path):
+    """Log file that belongs to a compacted dict, e.g. rc_dict.json -> rc_dict.jsonl"""
+    return os.path.splitext(dict_path)[0] + ".jsonl"
+
+
+def append_record(dict_path, key, record):
+    """Append one record to the log of dict_path. Later records for the same key win on compaction."""
+    with open(log_path(dict_path), "a") as log:
+        log.write(json.dumps({"key": str(key), "record": record}) + "\n")
+
+
+def read_log(path):
+    """Yield (key, record) pairs from a log, skipping a truncated last line of an interrupted run."""
+    with open(path, "r") as log:
+        for line_number, line in enumerate(log, 1):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"Skipping unreadable record at {path}:{line_number}")
+                continue
+            yield entry["key"], entry["record"]
+
+
+def load_dict(dict_path):
+    """Load a compacted dict in whatever codec it was written."""
+    try:
+        path = rcCodec.find(os.path.splitext(dict_path)[0])
+        if path is None:
+            raise FileNotFoundError(dict_path)
+        return rcCodec.load(path)
+    except FileNotFoundError:
+        print(f"File '{dict_path}' not found. New dict created.")
+    except ValueError as e:
+        print(f"Error decoding {dict_path}: {e}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    return {}
+
+
+def compact(dict_path, codec="json"):
+    """
+    Merge the log of dict_path into dict_path and remove the log.
+
+    The log is moved aside before reading, so records appended by a running
+    crawl meanwhile go to a fresh log. The dict is written with codec (see
+    rc_codec.dump) to a temporary file first and then moved in place,
+    so consumers never see a half-written file.
+    """
+    path = log_path(dict_path)
+    compacting_path = path + ".compacting"
+    if os.path.exists(path) and not os.path.exists(compacting_path):
+        os.replace(path, compacting_path)
+    if not os.path.exists(compacting_path):
+        return 0
+
+    merged = load_dict(dict_path)
+    count = 0
+    for key, record in read_log(compacting_path):
+        merged[key] = record
+        count += 1
+
+    path = rcCodec.dump(merged, os.path.splitext(dict_path)[0], codec)
+    os.remove(compacting_path)
+
+    print(f"Compacted {count} records into {path} ({len(merged)} expositions).")
+    return count
+
+
+def exposition_folders(research_folder):
+    """Folders of all parsed expositions, research/{id}."""
+    return sorted(
+        os.path.join(research_folder, name) for name in os.listdir(research_folder)
+        if name.isdigit() and os.path.isdir(os.path.join(research_folder, name))
+    )
+
+
+def load_exposition(folder):
+    """Return (path, exp_dict) of the stored {id}.json in folder, in any codec, or (None, None)."""
+    num = os.path.basename(os.path.normpath(folder))
+    path = rcCodec.find(os.path.join(folder, num))
+    return (path, rcCodec.load(path)) if path else (None, None)
+
+
+@contextmanager
+def keep_mtime(folder):
+    """
+    Restore the mtime of an exposition folder after changing its contents:
+    parse_expo compares it with the last modification of the exposition to
+    decide whether to parse it again.
+    """
+    stat = os.stat(folder)
+    try:
+        yield
+    finally:
+        os.utime(folder, (stat.st_atime, stat.st_mtime))
+
+
+def rewrite_exposition(path, exp_dict):
+    """Write exp_dict back to path in the codec it was stored in, keeping the folder mtime."""
+    codec = rcCodec.codec_of(path)
+    with keep_mtime(os.path.dirname(path)):
+        rcCodec.dump(exp_dict, path[:-len(rcCodec.CODECS[codec])], codec=codec)
+
+
+if __name__ == "__main__":
+    # python3 -m common.rc_store [research_folder] [codec]
+    research_folder = sys.argv[1] if len(sys.argv) > 1 else "../research/"
+    codec = sys.argv[2] if len(sys.argv) > 2 else "json"
+    for name in ("rc_dict.json", "rc_advanced.json"):
+        compact(os.path.join(research_folder, name), codec)
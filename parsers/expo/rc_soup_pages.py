@@ -1,15 +1,19 @@
 #tools to parse hyperlinks in RC expositions and to locate subpages
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+from common.rc_documents import DocumentContext
+from common.rc_html import make_soup
+from common.rc_session import new_session
 import requests
 import json
+import re
 from urllib.parse import urlparse, unquote, urljoin
 from urllib.parse import unquote
 
 RCURL = 'https://www.researchcatalogue.net'
 JSONURL = "https://map.rcdata.org/internal_research.json"
 
-def getInternalResearch():
-    response = requests.get(JSONURL)
+def getInternalResearch(session=None):
+    response = (session or new_session()).get(JSONURL)
     data = response.json()
     output_file = "research/internal_research.json"
     with open(output_file, "w") as json_file:
@@ -25,6 +29,35 @@ def getPageType(page):
         type = "undefined"
     return type
 
+# regions of a page that the extraction of each page type reads
+PAGE_REGIONS = {
+    "weave-graphical": SoupStrainer(id="container-weave"),
+    "weave-block": SoupStrainer(id="container-weave"),
+    "iframe": SoupStrainer("iframe"),
+}
+
+HTML_CLASS = re.compile(rb'<html\b[^>]*?\bclass\s*=\s*["\']([^"\']*)', re.IGNORECASE)
+
+def sniffPageType(content):
+    """First class of the <html> tag, read from the raw bytes without parsing."""
+    if isinstance(content, str):
+        content = content.encode()
+    match = HTML_CLASS.search(content)
+    if match and match.group(1).split():
+        return match.group(1).split()[0].decode()
+    return None
+
+def parsePage(content, parser="html.parser", partial=False):
+    """
+    Parse an exposition page and return (pageType, parsed).
+    With partial parsing the page type is sniffed from the raw html and only
+    the regions in PAGE_REGIONS are parsed; otherwise the whole page is.
+    """
+    if partial and (pageType := sniffPageType(content)) in PAGE_REGIONS:
+        return pageType, make_soup(content, parser=parser, parse_only=PAGE_REGIONS[pageType])
+    parsed = make_soup(content, parser=parser)
+    return str(getPageType(parsed)[0]), parsed
+
 def getExpositionId(fullUrl):
     return fullUrl.split("/")[4]
 
@@ -127,19 +160,6 @@ def getDataFollowLinks(page):
     links = [RCURL + link if isRelative(link) else link for link in links if link]
     return links
 
-whitelist = ["doi.org", "dx.doi.org"]
-
-def is_broken_link(url):
-    try:
-        if url.startswith("/"):
-            return False
-        if any(domain in url for domain in whitelist):
-            return False
-        response = requests.head(url, allow_redirects=True, timeout=5)
-        return response.status_code >= 400
-    except requests.RequestException:
-        return True
-
 def is_researchcatalogue_domain(url):
     """Check if URL belongs to researchcatalogue.net domain or its subdomains"""
     try:
@@ -248,11 +268,11 @@ def getPages(expositionUrl, page):
     subpages = list(set(subpages))
     return subpages
 
-def getAllPages(expositionUrl, page, meta_page_url, session): #now we don't make a difference anymore btw TOC and subpages
+def getAllPages(expositionUrl, page, meta_page_url, session, documents=None): #now we don't make a difference anymore btw TOC and subpages
     try:
         pages = getPages(expositionUrl, page)
-        meta = session.get(meta_page_url)
-        meta_soup = BeautifulSoup(meta.content, 'html.parser')
+        documents = documents or DocumentContext(session)
+        meta_soup = documents.soup(meta_page_url)
         meta_pages = getPages(expositionUrl, meta_soup)
         pages = list(set(pages + meta_pages))
     except:
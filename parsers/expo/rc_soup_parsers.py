@@ -2,25 +2,25 @@ from .rc_soup_pages import *
 from .rc_soup_tools import *
 
 def parse_graphical(parsed, debug=0):
+    found = collectTools(getWeave(parsed))
     tool_entries = {}
     for tool in ALLTOOLS:
-        if tool in TEXTTOOLS:
-            if (elements := getTexts(parsed, tool, debug)):
-                tool_entries[tool] = elements
-        else:
-            if (elements := getTools(parsed, tool, debug)):
-                tool_entries[tool] = elements
+        if (elements := extractTools(found[tool], tool, debug)):
+            tool_entries[tool] = elements
     
     return tool_entries
 
 def parse_block(parsed, debug=0):
+    weave = getWeave(parsed)
+    found = collectTools(weave)
+    block_tools = extractBlockTools(weave.find_all(class_="row"), debug)
     tool_entries = {} 
     for tool in ALLTOOLS:
         if tool in TEXTTOOLS:
-            if (elements := getTexts(parsed, tool, debug)):
+            if (elements := extractTools(found[tool], tool, debug)):
                 tool_entries[tool] = elements
         else:
-            if (elements := getBlockTools(parsed, tool, debug)):
+            if (elements := block_tools[tool]):
                 tool_entries[tool] = elements
     
     return tool_entries
@@ -1,5 +1,5 @@
 # tools to parse RC tools in expositions
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
 from datetime import datetime
 from typing import Optional
 import re
@@ -103,6 +103,26 @@ def removeStyle(text: str):
         script.extract()
     return soup.get_text()
 
+# contents that get_text() on an html.parser soup leaves out (ruby annotations included)
+NON_TEXT_TAGS = ("script", "style", "template", "rt", "rp")
+
+def iterPlainStrings(tag):
+    for child in tag.children:
+        if isinstance(child, Tag):
+            if child.name not in NON_TEXT_TAGS:
+                yield from iterPlainStrings(child)
+        elif type(child) in (NavigableString, CData):
+            yield child
+
+def getPlainText(content):
+    """
+    Plain text of an already parsed subtree, without <script>/<style> contents.
+    Same result as removeStyle(str(content)), without serializing and re-parsing.
+    """
+    if content is None:
+        return "None"  # removeStyle(str(None))
+    return "".join(iterPlainStrings(content))
+
 def getAuthor(tool) -> Optional[str]:
     return tool.get("data-last-modified-by")
 
@@ -216,13 +236,13 @@ def getVideoAttributes(tool):
 
 def getTextAttributes(tool):
     content = getContent(tool)
-    return getBaseAttributes(tool, {"src": removeStyle(str(content))})
+    return getBaseAttributes(tool, {"src": getPlainText(content)})
 
 def getSimpleTextAttributes(tool):
     print(f"getToolAttributes called with: {tool}")
     content = getContent(tool)
     print(f"Extracted content: {content}")
-    arttributes = getBaseAttributes(tool, {"src": removeStyle(str(content))})
+    arttributes = getBaseAttributes(tool, {"src": getPlainText(content)})
     print(f"Extracted attributes: {arttributes}")
     return arttributes
 
@@ -304,6 +324,52 @@ def getBlockTools(page, which, debug=False):
 
     return all_attributes
 
+# ------------------------------
+# Single-pass extraction
+# ------------------------------
+def getWeave(page):
+    """The weave container, or the whole page if it has none."""
+    return page.find("div", id="container-weave") or page
+
+def collectTools(root):
+    """Walk root once and group every tool element by tool type, in document order."""
+    found = {which: [] for which in ALLTOOLS}
+    for tool in root.find_all(class_=ALLTOOLS):
+        classes = tool.get("class", [])
+        for which in ALLTOOLS:
+            if which in classes:
+                found[which].append(tool)
+    return found
+
+def extractTools(tools, which, debug=False):
+    """Dispatch collected tools of one type; like getTools, a failing type yields []."""
+    fn = TOOL_DISPATCH.get(which, getToolAttributes)
+    try:
+        attributes = list(map(fn, tools))
+    except Exception:
+        if debug: print(f"found 0 {which}")
+        return []
+    if debug: print(f"found {len(tools)} {which}")
+    return attributes
+
+def extractBlockTools(rows, debug=False):
+    """Walk every row once and extract all non-text tools with their cell and row."""
+    found = {which: [] for which in TOOLS}
+    for row_index, row in enumerate(rows):
+        row_tools = collectTools(row)
+        for which in TOOLS:
+            try:
+                fn = TOOL_DISPATCH.get(which, getToolAttributes)
+                attributes = list(map(fn, row_tools[which]))
+                found[which].extend(process_tool_cells(attributes, row_tools[which], row_index))
+            except Exception as e:
+                if debug:
+                    print(f"Error processing row {row_index}: {e}")
+    if debug:
+        for which, attributes in found.items():
+            print(f"Found {len(attributes)} {which}")
+    return found
+
 def getIframe(soup):
     """
     Finds the first iframe src attribute in a BeautifulSoup parsed HTML object.
@@ -12,6 +12,8 @@ import os
 import re
 from pathlib import Path
 from typing import Dict, List, Set
+from common.rc_blobs import blob_folder, load_tool_html
+from common import rc_codec as rcCodec
 
 
 def find_mouse_events_in_text(text: str) -> Set[str]:
@@ -54,8 +56,7 @@ def process_exposition_file(file_path: Path) -> Dict:
         Dict: Information about found mouse events or None if no events found
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = rcCodec.load(str(file_path))
         
         exposition_id = data.get('id')
         exposition_url = data.get('url', '')
@@ -73,6 +74,9 @@ def process_exposition_file(file_path: Path) -> Dict:
             
             # Check each tool-text element
             for tool in tool_texts:
+                # expositions parsed with --blobs keep the tool html in the blob store
+                if 'tool-blob' in tool:
+                    tool = load_tool_html(tool, blob_folder(file_path.parent))
                 tool_id = tool.get('id', 'unknown')
                 tool_content = tool.get('tool', '')
                 
@@ -103,8 +107,8 @@ def process_exposition_file(file_path: Path) -> Dict:
         
         return None
         
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON from {file_path}: {e}")
+    except ValueError as e:
+        print(f"Error decoding {file_path}: {e}")
         return None
     except Exception as e:
         print(f"Error processing {file_path}: {e}")
@@ -131,10 +135,11 @@ def main():
     # Iterate through all subdirectories in research folder
     for exposition_dir in research_dir.iterdir():
         if exposition_dir.is_dir():
-            # Look for JSON file with same name as directory
-            json_file = exposition_dir / f"{exposition_dir.name}.json"
+            # Look for JSON file with same name as directory (in any output codec)
+            json_file = rcCodec.find(str(exposition_dir / exposition_dir.name))
             
-            if json_file.exists():
+            if json_file:
+                json_file = Path(json_file)
                 print(f"Processing: {json_file}")
                 total_processed += 1
                 
@@ -1,21 +1,14 @@
-from bs4 import BeautifulSoup
+from common.rc_documents import DocumentContext
 import json
 import os
 import sys
 from urllib.parse import urlparse, parse_qs
 
-def extract_copyrights(url, session):
+def extract_copyrights(url, session, documents=None):
     print("Get copyrights: " + url)
-    response = session.get(url)
-    raw_html = response.text
-    
-    # Try html5lib first (better for correcting table tags), fall back to html.parser
-    try:
-        soup = BeautifulSoup(raw_html, 'html5lib')
-        print("HTML parsed with html5lib")
-    except Exception as e:
-        print(f"html5lib parser not available: {e}, using html.parser instead")
-        soup = BeautifulSoup(raw_html, 'html.parser')
+    # the copyright tables need a repairing parser (html5lib instead of html.parser, see make_soup)
+    documents = documents or DocumentContext(session)
+    soup = documents.soup(url, repair=True)
 
     # Extract exposition ID - the last integer in the URL
     import re
@@ -0,0 +1,103 @@
+# cross-exposition media store: every media file is kept once and hardlinked into the exposition folders
+from expo.rc_soup_tools import convert_media_url
+from urllib.parse import urlparse
+import hashlib
+import threading
+import shutil
+import glob
+import re
+import os
+
+# RC media are named after their hash, optionally with the size of the rendition (..._199x159)
+RC_MEDIA = re.compile(r"[0-9a-f]{32}[\w-]*")
+# characters of a path segment that do not go into a store key
+UNSAFE = re.compile(r"[^\w-]")
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def media_key(url):
+    """
+    Store key of an RC media url (hash and rendition), or None for other urls.
+    /resources/generate/{hash}/{w}/{h} urls are keyed like the cache file they
+    stand for ({hash}_{w}x{h}); otherwise the hash may be any path segment,
+    the segments after it name the rendition.
+    """
+    path = urlparse(convert_media_url(urlparse(url).path)).path
+    segments = [os.path.splitext(segment)[0] for segment in path.split("/") if segment]
+    for index in range(len(segments) - 1, -1, -1):
+        if RC_MEDIA.fullmatch(segments[index]):
+            rendition = "".join("-" + UNSAFE.sub("_", segment) for segment in segments[index + 1:])
+            return f"rc-{segments[index]}{rendition}"
+    return None
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while (chunk := file.read(CHUNK_SIZE)):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_path(store, key, extension=""):
+    name = key.split("-", 1)[1]
+    return os.path.join(store, name[:2], key + extension)
+
+
+def find(store, key):
+    """Stored file for key (with whatever extension it was saved with), or None."""
+    paths = glob.glob(glob.escape(store_path(store, key)) + ".*")
+    paths = [path for path in paths if not path.endswith(".tmp")]
+    return paths[0] if paths else None
+
+
+def link(source, target):
+    """Hardlink source to target, replacing target; copy when hardlinks are not possible."""
+    # staged under a name of its own, concurrent links of the same media do not collide
+    tmp_path = f"{target}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def fetch(store, url, folder, name):
+    """
+    Link the stored copy of url into folder as name.<ext> and return its path.
+    Returns None when url is not an RC media url or not stored yet.
+    """
+    key = media_key(url)
+    stored = find(store, key) if key else None
+    if not stored:
+        return None
+    path = f"{folder}{name}{os.path.splitext(stored)[1]}"
+    link(stored, path)
+    return path
+
+
+def add(store, url, path):
+    """
+    Add the downloaded file at path to the store, under the RC media key of
+    url or else under the sha256 of its content. When the store already
+    holds the same content, path is replaced by a link to the stored copy.
+    """
+    key = media_key(url) or f"sha256-{file_digest(path)}"
+    stored = find(store, key)
+    if stored:
+        link(stored, path)
+        return path
+    target = store_path(store, key, os.path.splitext(path)[1])
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        link(path, target)
+    except OSError:
+        # another worker stored the same media meanwhile, that copy is as good
+        if not find(store, key):
+            raise
+    return path
@@ -1,82 +1,187 @@
+from concurrent.futures import ThreadPoolExecutor
+from media import rc_media_store as rcMediaStore
+from common.rc_options import RCOptions
+from urllib.parse import urlparse
 import mimetypes
+import requests
+import hashlib
+import glob
+import os
+
+CHUNK_SIZE = 1024 * 1024
+
+def copyright_usages(copyrights):
+    """
+    Map every tool id to the copyright entries that list it as a usage, as
+    (entry, index of the tool in entry["id"], media key of the entry) in the
+    order of copyrights.
+    """
+    usages = {}
+    for media in copyrights:
+        if isinstance(media['id'], list):
+            media_key = tuple(media['id'])
+            for index, tool_id in enumerate(media['id']):
+                matches = usages.setdefault(tool_id, [])
+                # a tool listed twice in one entry matches its first usage, like list.index
+                if not matches or matches[-1][0] is not media:
+                    matches.append((media, index, media_key))
+    return usages
+
+def insert_copyrights(copyrights, exposition, session, folder, download=True, options=RCOptions()):
+    usages = copyright_usages(copyrights)
+    path_storage = {}  # media key -> download job, every media is downloaded once
+    targets = []       # (tool, field, media key or list of media keys)
 
-def insert_copyrights(copyrights, exposition, session, folder, download=True):
-    path_storage = {}
-    
     for page_id, page_data in exposition.items():
         tools = page_data.get('tools')
         if tools:
             for tool_category, tools_list in page_data['tools'].items():
                 for tool in tools_list:
                     tool_id = tool['id']
-                    for media in copyrights:
-                        if isinstance(media['id'], list) and tool_id in media['id']:
-                            index = media['id'].index(tool_id) 
-                            tool.update(media)
-                            tool['id'] = tool_id 
-                            tool['tool'] = media['tool'][index] 
-                            if download:
-                                if tool_category in ['tool-slideshow']:
-                                    try:
-                                        if isinstance(tool['src'], list):
-                                            paths = []
-                                            for index, src in enumerate(tool['src']):
-                                                media_key = (tuple(media['id']) if isinstance(media['id'], list) else media['id'], index)
-                                                if media_key not in path_storage:
-                                                    unique_tool_id = f"{tool_id}_{index}"
-                                                    path = download_media(session, src, folder, unique_tool_id)
-                                                    path_storage[media_key] = path
-                                                else:
-                                                    path = path_storage[media_key]
-                                                paths.append(path)
-                                            tool["paths"] = paths
-                                        else:
-                                            media_key = tuple(media['id']) if isinstance(media['id'], list) else media['id']
-                                            if index == 0:
-                                                path = download_media(session, tool['src'], folder, tool_id)
-                                                path_storage[media_key] = path
-                                            else:
-                                                path = path_storage.get(media_key)
-                                            tool["path"] = path
-                                    except Exception as e:
-                                        print(f"An error occurred while downloading slideshow media: {e}")
-                                elif tool_category in ['tool-picture', 'tool-audio', 'tool-video', 'tool-pdf']:
-                                    try:
-                                        media_key = tuple(media['id']) 
+                    for media, index, media_key in usages.get(tool_id, ()):
+                        tool.update(media)
+                        tool['id'] = tool_id 
+                        tool['tool'] = media['tool'][index] 
+                        if download:
+                            if tool_category in ['tool-slideshow']:
+                                try:
+                                    if isinstance(tool['src'], list):
+                                        keys = []
+                                        for index, src in enumerate(tool['src']):
+                                            frame_key = (media_key, index)
+                                            if frame_key not in path_storage:
+                                                unique_tool_id = f"{tool_id}_{index}"
+                                                path_storage[frame_key] = (src, unique_tool_id)
+                                            keys.append(frame_key)
+                                        targets.append((tool, "paths", keys))
+                                    else:
                                         if index == 0:
-                                            path = download_media(session, tool['src'], folder, tool_id)
-                                            path_storage[media_key] = path 
-                                        else:
-                                            path = path_storage.get(media_key)
-                                        tool["path"] = path
-                                    except Exception as e:
-                                        print(f"An error occurred while downloading media: {e}") 
-                                else:
-                                    print(f"{tool_id} not downloaded. Category: {tool_category}")
+                                            path_storage.setdefault(media_key, (tool['src'], tool_id))
+                                        targets.append((tool, "path", media_key))
+                                except Exception as e:
+                                    print(f"An error occurred while downloading slideshow media: {e}")
+                            elif tool_category in ['tool-picture', 'tool-audio', 'tool-video', 'tool-pdf']:
+                                try:
+                                    if index == 0:
+                                        path_storage.setdefault(media_key, (tool['src'], tool_id))
+                                    targets.append((tool, "path", media_key))
+                                except Exception as e:
+                                    print(f"An error occurred while downloading media: {e}") 
+                            else:
+                                print(f"{tool_id} not downloaded. Category: {tool_category}")
         else:
             print(f"No tools found for page {page_id}") 
+
+    # usages whose media has no download job (its first usage is not in the exposition) get None
+    paths = download_all(session, path_storage, folder, options) if path_storage else {}
+    for tool, field, keys in targets:
+        if field == "paths":
+            tool["paths"] = [paths.get(key) for key in keys]
+        else:
+            tool["path"] = paths.get(keys)
     return exposition
 
-def download_media(session, file_url, folder, name):
-    try:
-        response = session.get(file_url)
+def download_all(session, jobs, folder, options=RCOptions()):
+    """Download {media key: (src, name)} jobs on a bounded thread pool and return {media key: path}."""
+    print(f"Downloading {len(jobs)} media with {options.media_workers} workers.")
+    with ThreadPoolExecutor(max_workers=options.media_workers) as executor:
+        futures = {
+            key: executor.submit(download_media, session, src, folder, name, options)
+            for key, (src, name) in jobs.items()
+        }
+    return {key: future.result() for key, future in futures.items()}
+
+def discard(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def part_path(folder, name, file_url):
+    """
+    Unfinished download of file_url as folder/name.{url tag}.part. The tag is
+    taken from the url path (not the signed query), so a later run resumes
+    the file only when the tool still shows the same media.
+    """
+    tag = hashlib.sha256(urlparse(file_url).path.encode("utf-8")).hexdigest()[:16]
+    return f'{folder}{name}.{tag}.part'
 
-        if response.status_code == 200:
-            # guess extension from response headers
-            content_type = response.headers.get('Content-Type')
-            file_extension = mimetypes.guess_extension(content_type)
-            
-           
-            save_path = f'{folder}{name}{file_extension if file_extension else ".bin"}'
-            
-            with open(save_path, 'wb') as file:
-                file.write(response.content)
-            
-            print(f"File downloaded successfully and saved as {save_path}")
+def download_media(session, file_url, folder, name, options=RCOptions()):
+    """
+    Stream file_url to folder/name.<ext> in chunks and return the path, or False.
+
+    The body goes to a .part file first (see part_path) and is renamed when
+    complete. A broken transfer is resumed from the size of the .part file
+    with a Range request, in the same run or, as parse_expo keeps the .part
+    files when it parses an exposition again, in a later one (RC media urls
+    are content hashes, so the bytes behind a url never change).
+    Files larger than options.max_media_size are not downloaded.
+    With options.media_store set, stored media are linked instead of
+    downloaded and new downloads are added to the store.
+    """
+    part = part_path(folder, name, file_url)
+    max_size = options.max_media_size
+    store = options.media_store
+    try:
+        if store and (save_path := rcMediaStore.fetch(store, file_url, folder, name)):
+            print(f"File linked from media store as {save_path}")
             return save_path
-        else:
-            print(f"Failed to download the file. Status code: {response.status_code}")
-            return False
+        # unfinished downloads of media the tool no longer shows
+        for stale in glob.glob(glob.escape(f'{folder}{name}.') + '*.part'):
+            if stale != part:
+                discard(stale)
+        for attempt in range(options.media_attempts):
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            # ranges count raw bytes, so the body must not be content-encoded
+            headers = {"Accept-Encoding": "identity"}
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+            try:
+                with session.get(file_url, headers=headers, stream=True, timeout=options.media_timeout) as response:
+                    if response.status_code == 416:
+                        # stale .part, larger than the file: start over
+                        discard(part)
+                        continue
+                    if response.status_code not in (200, 206):
+                        print(f"Failed to download the file. Status code: {response.status_code}")
+                        return False
+                    if response.status_code == 200:
+                        offset = 0
+
+                    size = offset + int(response.headers.get('Content-Length') or 0)
+                    if max_size and size > max_size:
+                        print(f"Not downloaded, {size} bytes is larger than the limit of {max_size} bytes: {file_url}")
+                        discard(part)
+                        return False
+
+                    # guess extension from response headers
+                    content_type = response.headers.get('Content-Type', '').split(';')[0]
+                    file_extension = mimetypes.guess_extension(content_type)
+
+                    with open(part, 'ab' if offset else 'wb') as file:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            file.write(chunk)
+                            offset += len(chunk)
+                            if max_size and offset > max_size:
+                                break
+                    if max_size and offset > max_size:
+                        print(f"Not downloaded, larger than the limit of {max_size} bytes: {file_url}")
+                        discard(part)
+                        return False
+
+                save_path = f'{folder}{name}{file_extension if file_extension else ".bin"}'
+                os.replace(part, save_path)
+                if store:
+                    try:
+                        rcMediaStore.add(store, file_url, save_path)
+                    except OSError as e:
+                        # the download itself is complete
+                        print(f"Could not add {save_path} to the media store: {e}")
+                print(f"File downloaded successfully and saved as {save_path}")
+                return save_path
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                print(f"Download of {file_url} interrupted ({e}), resuming.")
+        # the .part file is kept, a later download of the same media resumes it, also in the next run
+        print(f"This media was not downloaded after {options.media_attempts} attempts: {file_url}")
+        return False
     except Exception as e:
         print(f"This media was not downloaded: {e}")
-        return False
\ No newline at end of file
+        return False
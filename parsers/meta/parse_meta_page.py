@@ -1,12 +1,13 @@
-from bs4 import BeautifulSoup
+from common.rc_documents import DocumentContext
 from datetime import datetime
 import time
 import re
 from urllib.parse import urlparse, parse_qs
 
-def parse_meta_page(url, session):
+def parse_meta_page(url, session, documents=None):
     print("Parsing meta page: " + url)
-    meta = session.get(url)
+    documents = documents or DocumentContext(session)
+    meta = documents.get(url)
     print(f"Response status: {meta.status_code}")
     print(f"Content length: {len(meta.content)} bytes")
     
@@ -19,14 +20,14 @@ def parse_meta_page(url, session):
         return None
     
     try:
-        meta_page = BeautifulSoup(meta.content, 'html.parser')
-        print("HTML parsed successfully with html.parser")
+        meta_page = documents.soup(url)
+        print("HTML parsed successfully")
     except Exception as e:
-        print(f"ERROR parsing HTML with html.parser: {e}")
-        print(f"Attempting fallback with html5lib...")
+        print(f"ERROR parsing HTML: {e}")
+        print(f"Attempting fallback with a repairing parser...")
         try:
-            meta_page = BeautifulSoup(meta.content, 'html5lib')
-            print("HTML parsed successfully with html5lib")
+            meta_page = documents.soup(url, repair=True)
+            print("HTML parsed successfully with a repairing parser")
         except Exception as e2:
             print(f"ERROR: Failed to parse HTML with both parsers: {e2}")
             return None
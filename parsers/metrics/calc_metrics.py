@@ -37,13 +37,91 @@ def calculate_intersection(rect1, rect2):
     # Calculate overlap area
     return x_overlap * y_overlap
 
-# Calculate the total overlap area between all rectangles
-def calculate_total_overlap(rectangles):
-    overlap_area = 0
-    for i in range(len(rectangles)):
-        for j in range(i + 1, len(rectangles)):
-            overlap_area += calculate_intersection(rectangles[i], rectangles[j])
-    return overlap_area
+# Rectangles as arrays of left, top, right, bottom edges
+def rectangle_edges(rectangles):
+    r = np.asarray(rectangles, dtype=float).reshape(-1, 4)
+    return r[:, 0], r[:, 1], r[:, 0] + r[:, 2], r[:, 1] + r[:, 3]
+
+# Calculate the total overlap area between all rectangles (sum over all pairs, as calculate_intersection)
+def calculate_total_overlap(rectangles, block=256):
+    if len(rectangles) < 2:
+        return 0
+    left, top, right, bottom = rectangle_edges(rectangles)
+    order = np.argsort(left, kind="stable")
+    left, top, right, bottom = left[order], top[order], right[order], bottom[order]
+    # sorted by left edge, rectangle i can only overlap the ones that start before it ends
+    ends = np.searchsorted(left, right, side="left")
+
+    overlap_area = 0.0
+    for start in range(0, len(left), block):
+        stop = min(start + block, len(left))
+        last = max(int(ends[start:stop].max()), stop)
+        rows = slice(start, stop)
+        cols = slice(start, last)
+        x_overlap = np.minimum(right[rows, None], right[None, cols]) - np.maximum(left[rows, None], left[None, cols])
+        y_overlap = np.minimum(bottom[rows, None], bottom[None, cols]) - np.maximum(top[rows, None], top[None, cols])
+        area = np.clip(x_overlap, 0, None) * np.clip(y_overlap, 0, None)
+        # every pair once: only columns after the row
+        pairs = np.arange(start, last)[None, :] > np.arange(start, stop)[:, None]
+        overlap_area += area[pairs].sum()
+    return float(overlap_area)
+
+# Calculate the area covered by the union of the rectangles, optionally clipped to a canvas (x0, y0, x1, y1)
+def calculate_union_area(rectangles, canvas=None):
+    if len(rectangles) == 0:
+        return 0.0
+    left, top, right, bottom = rectangle_edges(rectangles)
+    if canvas:
+        left, top = np.maximum(left, canvas[0]), np.maximum(top, canvas[1])
+        right, bottom = np.minimum(right, canvas[2]), np.minimum(bottom, canvas[3])
+    keep = (right > left) & (bottom > top)
+    left, top, right, bottom = left[keep], top[keep], right[keep], bottom[keep]
+    if not len(left):
+        return 0.0
+
+    # sweep over x; a segment tree over the distinct y edges holds the covered height
+    ys = np.unique(np.concatenate([top, bottom]))
+    low, high = np.searchsorted(ys, top), np.searchsorted(ys, bottom)
+    xs = np.concatenate([left, right])
+    order = np.argsort(xs, kind="stable")
+    xs = xs[order].tolist()
+    deltas = np.concatenate([np.ones(len(left), dtype=int), -np.ones(len(left), dtype=int)])[order].tolist()
+    lows = np.concatenate([low, low])[order].tolist()
+    highs = np.concatenate([high, high])[order].tolist()
+
+    size = 1
+    while size < len(ys) - 1:
+        size *= 2
+    count = [0] * (2 * size)
+    covered = [0.0] * (2 * size)
+    length = [0.0] * (2 * size)
+    length[size:size + len(ys) - 1] = np.diff(ys).tolist()
+    for node in range(size - 1, 0, -1):
+        length[node] = length[2 * node] + length[2 * node + 1]
+
+    def update(node, node_low, node_high, low, high, delta):
+        if high <= node_low or node_high <= low:
+            return
+        if low <= node_low and node_high <= high:
+            count[node] += delta
+        else:
+            middle = (node_low + node_high) // 2
+            update(2 * node, node_low, middle, low, high, delta)
+            update(2 * node + 1, middle, node_high, low, high, delta)
+        if count[node]:
+            covered[node] = length[node]
+        elif node_high - node_low == 1:
+            covered[node] = 0.0
+        else:
+            covered[node] = covered[2 * node] + covered[2 * node + 1]
+
+    area = 0.0
+    previous = xs[0]
+    for x, delta, low, high in zip(xs, deltas, lows, highs):
+        area += covered[1] * (x - previous)
+        previous = x
+        update(1, 0, size, low, high, delta)
+    return area
 
 # Calculate overlap percentage
 def calculate_overlap_percentage(rectangles):
@@ -65,8 +143,9 @@ def calculate_white_space(rectangles):
     if effective_canvas_area == 0:
         return 100.0  # Avoid division by zero if effective canvas area is zero
 
-    total_rectangles_area = calculate_total_area(rectangles)
-    white_space_area = effective_canvas_area - total_rectangles_area
+    # area actually covered: overlapping tools count once, parts outside the canvas not at all
+    covered_area = calculate_union_area(rectangles, canvas=(0, 0, max_x, max_y))
+    white_space_area = effective_canvas_area - covered_area
     white_space_percentage = (white_space_area / effective_canvas_area) * 100
     return white_space_percentage
 
@@ -1,7 +1,11 @@
-# input: dictionary of tools (per page). output: image file
+# input: dictionary of tools (per page). output: image file (jpg or svg)
+import hashlib
+import json
 import os
 from PIL import Image, ImageDraw
 
+MAP_FORMATS = ("jpg", "svg")
+
 TOOL_COLORS = {
     "tool-text": (255, 0, 0),
     "tool-simpletext": (0, 255, 0),
@@ -26,17 +30,20 @@ def get_scaling_factor(tools, target_width, target_height):
     scale_y = target_height / max_y if max_y > 0 else 1
     return min(scale_x, scale_y)
 
-def generate_tools_map(output_file, target_width=800, target_height=600, **tools_dict):
-
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
+def collect_tools(tools_dict):
     all_tools = []
     for key, value in tools_dict.items():
         if isinstance(value, list):
             all_tools.extend(value)
         else:
             print(f"Skipping non-tool entry {key}: {type(value)}")
+    return all_tools
 
+def generate_tools_map(output_file, target_width=800, target_height=600, **tools_dict):
+
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    
+    all_tools = collect_tools(tools_dict)
     scaling_factor = get_scaling_factor(all_tools, target_width, target_height)
 
     img = Image.new('RGB', (target_width, target_height), color='white')
@@ -56,4 +63,75 @@ def generate_tools_map(output_file, target_width=800, target_height=600, **tools
                 draw.text((scaled_x + 5, scaled_y + 5), tool_type, fill=(0, 0, 0))
 
     img.save(output_file)
-    print(f"Map saved to {output_file}")
\ No newline at end of file
+    print(f"Map saved to {output_file}")
+
+def generate_tools_svg(output_file, target_width=800, target_height=600, **tools_dict):
+    """
+    Same map as generate_tools_map as svg. The rectangles keep their page
+    coordinates in the viewBox, so the file is small and can be scaled freely.
+    """
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    all_tools = collect_tools(tools_dict)
+    scaling_factor = get_scaling_factor(all_tools, target_width, target_height)
+    view_width = target_width / scaling_factor
+    view_height = target_height / scaling_factor
+    font_size = 12 / scaling_factor
+
+    elements = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{target_width}" height="{target_height}" '
+        f'viewBox="0 0 {view_width:g} {view_height:g}">',
+        f'<rect width="100%" height="100%" fill="white"/>',
+        f'<g fill="none" stroke-width="3" vector-effect="non-scaling-stroke" font-family="sans-serif" font-size="{font_size:g}">',
+    ]
+    for tool_type, tools in tools_dict.items():
+        if tool_type in TOOL_COLORS and isinstance(tools, list):
+            color = "rgb({},{},{})".format(*TOOL_COLORS[tool_type])
+            for tool in tools:
+                x, y, width, height = tool["dimensions"]
+                elements.append(
+                    f'<rect x="{x}" y="{y}" width="{max(width, 0)}" height="{max(height, 0)}" '
+                    f'stroke="{color}" vector-effect="non-scaling-stroke"/>'
+                )
+                elements.append(
+                    f'<text x="{x + 5 / scaling_factor:g}" y="{y + 5 / scaling_factor + font_size:g}" '
+                    f'fill="black" stroke="none">{tool_type}</text>'
+                )
+    elements.append("</g></svg>")
+
+    with open(output_file, "w") as file:
+        file.write("\n".join(elements))
+    print(f"Map saved to {output_file}")
+
+def geometry_digest(tools_dict, format, target_width, target_height):
+    """sha256 of everything a map is drawn from: tool types, dimensions, size and format."""
+    geometry = [
+        [tool_type, [tool["dimensions"] for tool in tools]]
+        for tool_type, tools in tools_dict.items() if isinstance(tools, list)
+    ]
+    key = json.dumps([geometry, format, target_width, target_height])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def render_tools_map(folder, page, tools_dict, format="jpg", target_width=800, target_height=600):
+    """
+    Render the map of a page to folder/{page}.{format}. A map whose geometry
+    digest (stored in folder/{page}.json) is unchanged is not drawn again.
+    Returns (path, whether the map was drawn).
+    """
+    output_file = os.path.join(folder, f"{page}.{format}")
+    digest_file = os.path.join(folder, f"{page}.json")
+    digest = geometry_digest(tools_dict, format, target_width, target_height)
+    try:
+        with open(digest_file, "r") as file:
+            if json.load(file).get("digest") == digest and os.path.exists(output_file):
+                return output_file, False
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    if format == "svg":
+        generate_tools_svg(output_file, target_width, target_height, **tools_dict)
+    else:
+        generate_tools_map(output_file, target_width, target_height, **tools_dict)
+    with open(digest_file, "w") as file:
+        json.dump({"digest": digest}, file)
+    return output_file, True
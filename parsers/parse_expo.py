@@ -1,19 +1,24 @@
-from bs4 import BeautifulSoup
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from expo import rc_soup_parsers as rcParsers
 from expo import rc_soup_pages as rcPages
+from expo.rc_soup_tools import getWeave
 from media import extract_copyrights as mediaParser
 from screenshots import screenshot as rcScreenshot
-from common.rc_session import rc_session
+from common import rc_blobs as rcBlobs
+from common import rc_codec as rcCodec
+from common.rc_documents import DocumentContext
+from common import rc_cli as rcCli
+from common.rc_html import make_soup
+from common.rc_options import RCOptions
+from common.rc_session import rc_session, new_session, pop_stats, print_stats
 from media.rc_merge_data import insert_copyrights
 from metrics.calc_metrics import calc_metrics
-from metrics.generate_tools_map import generate_tools_map
+from metrics.generate_tools_map import render_tools_map
 from meta.parse_meta_page import parse_meta_page
 import datetime
 import traceback
 import getpass
-import requests
-import json
 import sys
 import os
 import shutil
@@ -27,7 +32,71 @@ def clean_url(url):
     return urlunparse(parsed_url._replace(path=clean_path.strip()))
 
 
-def main(url, debug, download, shot, maps, force, session=None, research_folder="../research/", username=None, password=None, **meta):
+def fetch_pages(pages, session, workers=4):
+    """Download all pages concurrently, at most `workers` at a time. Contents are returned in page order."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(lambda page: session.get(clean_url(page)).content, pages))
+
+
+def take_screenshot(take, page, parsed, screenshots_folder, pageNumber, options=RCOptions()):
+    """Screenshot of page with take, reused from the last run when the weave html is unchanged."""
+    digest = rcScreenshot.weaveDigest(getWeave(parsed))
+    if (screenshot := rcScreenshot.loadScreenshot(screenshots_folder, pageNumber, digest)):
+        print(f"Page {pageNumber} unchanged, keeping screenshot {screenshot['file']}")
+        return screenshot
+    screenshot = take(clean_url(page), screenshots_folder, pageNumber, options)
+    rcScreenshot.saveScreenshot(screenshots_folder, pageNumber, digest, screenshot)
+    return screenshot
+
+
+def clear_folder(folder, keep=()):
+    """Remove everything in folder except the entries named in keep."""
+    for name in os.listdir(folder):
+        if name in keep:
+            continue
+        entry = os.path.join(folder, name)
+        if os.path.isdir(entry) and not os.path.islink(entry):
+            shutil.rmtree(entry)
+        else:
+            os.remove(entry)
+
+
+def clear_exposition_folder(folder):
+    """
+    Clear the folder of an exposition that is parsed again, keeping what the
+    new run reuses: screenshots and maps of unchanged pages (see take_screenshot
+    and render_tools_map) and unfinished downloads (see download_media).
+    """
+    clear_folder(folder, keep=("screenshots", "maps", "media"))
+    media_folder = os.path.join(folder, "media")
+    if os.path.isdir(media_folder):
+        clear_folder(media_folder, keep=[name for name in os.listdir(media_folder) if name.endswith(".part")])
+
+
+def extract_page(url, parsed, pageType, debug=0):
+    """Extract tools, metrics, hyperlinks and iframe url from a parsed page (no side effects)."""
+    toolsDict = None
+    toolsMetrics = None
+    hrefs = None
+    iframe_url = None
+
+    match pageType:
+        case "weave-graphical":
+            toolsDict = rcParsers.parse_graphical(parsed, debug)
+            toolsMetrics = calc_metrics(**toolsDict)
+            hrefs = rcPages.getLinks(url, parsed)
+
+        case "weave-block":
+            toolsDict = rcParsers.parse_block(parsed, debug)
+            hrefs = rcPages.getLinks(url, parsed)
+
+        case "iframe":
+            iframe_url = rcParsers.parse_iframe(parsed)
+
+    return toolsDict, toolsMetrics, hrefs, iframe_url
+
+
+def main(url, debug, download, shot, maps, force, session=None, research_folder="../research/", username=None, password=None, options=RCOptions(), **meta):
     num = rcPages.getExpositionId(url)
     output_folder = os.path.join(research_folder, f"{num}")
 
@@ -49,16 +118,16 @@ def main(url, debug, download, shot, maps, force, session=None, research_folder=
     expo = session.get(clean_url(url))
     print("Parsing exposition: " + url)
     print(f"Response status: {expo.status_code}")
-    parsed = BeautifulSoup(expo.content, 'html.parser')
+    parsed = make_soup(expo.content, parser=options.parser)
 
     # access restrictions
     if "Authentication required" in parsed.get_text():
         print("Exposition with restricted visibility.")
         if username and password:
             print("Attempting authentication with provided credentials...")
-            session = rc_session(username, password)
+            session = rc_session(username, password, options)
             expo = session.get(clean_url(url))
-            parsed = BeautifulSoup(expo.content, 'html.parser')
+            parsed = make_soup(expo.content, parser=options.parser)
             if "Authentication required" in parsed.get_text():
                 print("Authentication failed.")
                 return None
@@ -72,6 +141,9 @@ def main(url, debug, download, shot, maps, force, session=None, research_folder=
         print("Exposition not accessible.")
         return None
 
+    # meta page is shared by parse_meta_page, extract_copyrights and getAllPages
+    documents = DocumentContext(session, options)
+
     # metadata
     if meta:
         meta_page_url = meta["meta-data-page"]
@@ -87,7 +159,7 @@ def main(url, debug, download, shot, maps, force, session=None, research_folder=
             return None
         try:
             print(meta_page_url)
-            meta = parse_meta_page(meta_page_url, session)
+            meta = parse_meta_page(meta_page_url, session, documents)
             modified = meta["last-modified"]
             print(f"Last-modified at: {datetime.datetime.fromtimestamp(modified)}")
         except Exception:
@@ -100,7 +172,8 @@ def main(url, debug, download, shot, maps, force, session=None, research_folder=
         print(f"Local folder timestamp: {datetime.datetime.fromtimestamp(local_timestamp)}")
         if modified + 86400 > local_timestamp:  # add one day tolerance
             print(f"Exposition already parsed, but maybe outdated. Reparsing at: {output_folder}.")
-            shutil.rmtree(output_folder)
+            # force removes the reused files as well
+            clear_exposition_folder(output_folder)
         else:
             print(f"Exposition already parsed at: {output_folder}. Skipping.")
             return
@@ -108,7 +181,7 @@ def main(url, debug, download, shot, maps, force, session=None, research_folder=
     # parse
     try:
         os.makedirs(output_folder, exist_ok=True)
-        output_file_path = os.path.join(output_folder, f"{num}.json")
+        output_base_path = os.path.join(output_folder, f"{num}")
 
         media_folder = os.path.join(output_folder, "media")
         if download:
@@ -127,66 +200,62 @@ def main(url, debug, download, shot, maps, force, session=None, research_folder=
             os.makedirs(maps_folder, exist_ok=True)
 
         exp_dict = {"id": int(num), "url": url, "pages": {}}
-        copyrights = mediaParser.extract_copyrights(meta_page_url, session)
-        pages = rcPages.getAllPages(url, parsed, meta_page_url, session)
+        copyrights = mediaParser.extract_copyrights(meta_page_url, session, documents)
+        pages = rcPages.getAllPages(url, parsed, meta_page_url, session, documents)
         exp_dict["pages"] = {rcPages.getPageNumber(page): {} for page in pages}
         print(f"Found {len(pages)} pages.")
         all_links = defaultdict(set)
 
-        for index, page in enumerate(pages):
-            subpage = session.get(clean_url(page))
-            parsed = BeautifulSoup(subpage.content, "html.parser")
-
-            pageNumber = rcPages.getPageNumber(page)
-            pageType = str(rcPages.getPageType(parsed)[0])
-            print(f"Processing page {index+1}/{len(pages)}: {page}, {pageType}")
-
-            toolsDict = None
-            toolsMetrics = None
-            hrefs = None
-            screenshot = None
-            map_file = None
-            iframe_url = None
-
-            match pageType:
-                case "weave-graphical":
-                    toolsDict = rcParsers.parse_graphical(parsed, debug)
-                    toolsMetrics = calc_metrics(**toolsDict)
-                    hrefs = rcPages.getLinks(url, parsed)
-                    if maps_folder:
-                        map_file = os.path.join(maps_folder, f"{pageNumber}.jpg")
-                        generate_tools_map(map_file, 800, 600, **toolsDict)
-                    if screenshots_folder:
-                        screenshot = rcScreenshot.screenshotGraphical(clean_url(page), screenshots_folder, pageNumber)
-
-                case "weave-block":
-                    toolsDict = rcParsers.parse_block(parsed, debug)
-                    hrefs = rcPages.getLinks(url, parsed)
-                    if screenshots_folder:
-                        screenshot = rcScreenshot.screenshotBlock(clean_url(page), screenshots_folder, pageNumber)
-
-                case "iframe":
-                    iframe_url = rcParsers.parse_iframe(parsed)
-
-            page_dict = {"id": pageNumber, "type": pageType}
-            if screenshot:
-                page_dict["screenshot"] = screenshot
-            if toolsDict:
-                page_dict["tools"] = toolsDict
-                exp_dict["copyrights"] = copyrights
-            if toolsMetrics:
-                page_dict["metrics"] = toolsMetrics
-            if hrefs:
-                page_dict["hyperlinks"] = hrefs
-            if hrefs:
-                for category, links in hrefs.items():
-                    all_links[category].update(links)
-            if map_file:
-                page_dict["map"] = map_file
-            if iframe_url:
-                page_dict["url"] = iframe_url
-
-            exp_dict["pages"][pageNumber] = page_dict
+        contents = fetch_pages(pages, session, options.page_workers)
+
+        # screenshots are taken by up to options.browsers browsers at once while the next pages are parsed
+        with ThreadPoolExecutor(max_workers=max(1, options.browsers)) as shooter:
+            for index, (page, content) in enumerate(zip(pages, contents)):
+                pageType, parsed = rcPages.parsePage(content, options.parser, options.partial)
+                pageNumber = rcPages.getPageNumber(page)
+                print(f"Processing page {index+1}/{len(pages)}: {page}, {pageType}")
+
+                toolsDict, toolsMetrics, hrefs, iframe_url = extract_page(url, parsed, pageType, debug)
+                screenshot = None  # future of the screenshot
+                map_file = None
+
+                match pageType:
+                    case "weave-graphical":
+                        if maps_folder:
+                            map_file, _ = render_tools_map(maps_folder, pageNumber, toolsDict)
+                        if screenshots_folder:
+                            screenshot = shooter.submit(take_screenshot, rcScreenshot.screenshotGraphical, page, parsed, screenshots_folder, pageNumber, options)
+
+                    case "weave-block":
+                        if screenshots_folder:
+                            screenshot = shooter.submit(take_screenshot, rcScreenshot.screenshotBlock, page, parsed, screenshots_folder, pageNumber, options)
+
+                page_dict = {"id": pageNumber, "type": pageType}
+                if screenshot:
+                    page_dict["screenshot"] = screenshot
+                if toolsDict:
+                    page_dict["tools"] = toolsDict
+                    exp_dict["copyrights"] = copyrights
+                if toolsMetrics:
+                    page_dict["metrics"] = toolsMetrics
+                if hrefs:
+                    page_dict["hyperlinks"] = hrefs
+                if hrefs:
+                    for category, links in hrefs.items():
+                        all_links[category].update(links)
+                if map_file:
+                    page_dict["map"] = map_file
+                if iframe_url:
+                    page_dict["url"] = iframe_url
+
+                exp_dict["pages"][pageNumber] = page_dict
+
+        # the screenshot entries keep their place in the page dicts
+        for page_dict in exp_dict["pages"].values():
+            if "screenshot" in page_dict:
+                page_dict["screenshot"] = page_dict["screenshot"].result()
+                if not page_dict["screenshot"]:
+                    del page_dict["screenshot"]
 
     except Exception as e:
         error = f"An error occurred: {e}. Traceback: {traceback.format_exc()}"
@@ -196,7 +265,7 @@ def main(url, debug, download, shot, maps, force, session=None, research_folder=
 
     if copyrights and isinstance(exp_dict, dict):
         exp_dict["pages"] = insert_copyrights(
-            copyrights, exp_dict["pages"], session, media_folder, download
+            copyrights, exp_dict["pages"], session, media_folder, download, options
         )
     elif copyrights and isinstance(exp_dict, (str, bytes)):
         print(f"ERROR: exp_dict is unexpectedly a string/bytes: {exp_dict}")
@@ -235,10 +304,13 @@ def main(url, debug, download, shot, maps, force, session=None, research_folder=
     found_urls = [url.rstrip('.,)') for url in urls]
     
     exp_dict["hyperlinks"]["simpleurls"] = found_urls
+
+    # raw tool html goes to the blob store next to the json, only digests stay inline
+    if options.blobs:
+        rcBlobs.store_tool_html(exp_dict, rcBlobs.blob_folder(output_folder))
                 
-    with open(output_file_path, "w") as outfile:
-        json.dump(exp_dict, outfile, indent=2)
-        print("Done.")
+    output_file_path = rcCodec.dump(exp_dict, output_base_path, options.codec)
+    print(f"Done. Saved to {output_file_path}")
 
     return exp_dict
 
@@ -255,10 +327,26 @@ Required Arguments:
     <maps>      : Generate visual maps (1 for enabled, 0 for disabled).
     <force>     : Always parse an exposition, even when it has been parsed before (1 for enabled, 0 for disabled).
 
-Optional Arguments (Flag Style):
-    --username="email"       : Username for RC authentication.
-    --password="password"    : Password for RC authentication.
-    --research-folder="path" : Path to research output folder.
+Options (--name value or --name=value):
+    --username "email"       : Username for RC authentication.
+    --password "password"    : Password for RC authentication.
+    --research-folder "path" : Path to research output folder.
+    --page-workers N         : Number of pages fetched concurrently (default: 4).
+    --cache-dir "path"       : Cache RC pages on disk and revalidate them on later runs (default: <research_folder>/.http_cache when --cache-ttl is given).
+    --cache-ttl SECONDS      : Serve cached pages younger than SECONDS without any request (default: 0, always revalidate).
+    --parser NAME            : HTML parser backend: html.parser (default), lxml or html5lib.
+    --partial 1              : Sniff the page type and parse only the regions that are extracted.
+    --retries N              : Retry failed connections and 429/5xx responses N times with exponential backoff (default: 3).
+    --rate N                 : Send at most N requests per second (default: unlimited).
+    --media-workers N        : With <download>, number of media downloaded concurrently (default: 4).
+    --media-store "path"     : With <download>, keep every media file once in path and hardlink it into the exposition folder (default: <research_folder>/.media_store, "none" to disable).
+    --max-media-size MB      : With <download>, skip media files larger than MB megabytes (default: no limit).
+    --browsers N             : With <shot>, number of headless browsers capturing pages at once (default: 1).
+    --browser-recycle N      : With <shot>, replace a headless browser by a fresh one after N screenshots (default: 50).
+    --resize-workers N       : With <shot>, processes that write the resized and compressed screenshots, 0 for none (default: 2).
+    --webp 1                 : With <shot>, also write a compressed WebP of every screenshot.
+    --codec NAME             : Output format: json (default), zstd (compressed json) or msgpack.
+    --blobs 1                : Store raw tool html once in a compressed blob store next to the json, keep only digests inline.
 
 Optional Arguments (Positional Style):
     username password        : For RC authentication (both required together).
@@ -277,44 +365,44 @@ Examples:
     print(usage)
 
 
+# options of parse_expo.py besides the crawl options shared with parse_rc.py
+FLAGS = {
+    "--username": str,
+    "--password": str,
+    "--research-folder": str,
+    **rcCli.CRAWL_FLAGS,
+}
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 7:
+    try:
+        values, args = rcCli.parse_flags(sys.argv[1:], FLAGS)
+    except rcCli.UsageError as e:
+        print(f"Error: {e}.")
+        print_usage()
+        sys.exit(1)
+
+    if len(args) < 6:
         print("Error: Missing required arguments.")
         print_usage()
         sys.exit(1)
 
-    url = str(sys.argv[1])
+    url = str(args[0])
     try:
-        debug = int(sys.argv[2])
-        download = int(sys.argv[3])
-        shot = int(sys.argv[4])
-        maps = int(sys.argv[5])
-        force = int(sys.argv[6])
+        debug = int(args[1])
+        download = int(args[2])
+        shot = int(args[3])
+        maps = int(args[4])
+        force = int(args[5])
     except ValueError:
         print("Error: debug, download, shot, maps, force must be integers (1 or 0).")
         print_usage()
         sys.exit(1)
 
-    # Parse optional arguments
-    username = None
-    password = None
-    research_folder = "../research/"  # default
-    
-    # Parse arguments from position 7 onwards
-    remaining_args = sys.argv[7:]  # All arguments after the required 6
-    
-    # Handle both --flag=value and positional argument styles
-    positional_args = []
-    
-    for arg in remaining_args:
-        if arg.startswith('--username='):
-            username = arg.split('=', 1)[1].strip('"')
-        elif arg.startswith('--password='):
-            password = arg.split('=', 1)[1].strip('"')
-        elif arg.startswith('--research-folder='):
-            research_folder = arg.split('=', 1)[1].strip('"')
-        else:
-            positional_args.append(arg)
+    username = values["--username"]
+    password = values["--password"]
+    research_folder = values["--research-folder"] or "../research/"  # default
+    positional_args = args[6:]
     
     # Handle remaining positional arguments if no flags were used
     if not username and not password and len(positional_args) >= 2:
@@ -333,29 +421,26 @@ if __name__ == "__main__":
         research_folder = positional_args[0]
     
     print(f"Using research folder: {research_folder}")
+
+    try:
+        options = rcCli.crawl_options(values, research_folder, download)
+    except rcCli.UsageError as e:
+        print(f"Error: {e}.")
+        print_usage()
+        sys.exit(1)
+    if values["--parser"]:
+        print(f"Using parser: {options.parser}")
+    if options.partial:
+        print("Parsing only the needed regions of each page.")
     
     if username and password:
         print(f"Using provided credentials for user: {username}")
-        session = rc_session(username, password)
-        main(url, debug, download, shot, maps, force, session=session, research_folder=research_folder, username=username, password=password)
+        session = rc_session(username, password, options)
+        main(url, debug, download, shot, maps, force, session=session, research_folder=research_folder, username=username, password=password, options=options)
     else:
         print("Proceeding without authentication.")
-        session = requests.Session()
-        session.headers.update({
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/137.0.0.0 Safari/537.36"
-            ),
-            "Accept": (
-                "text/html,application/xhtml+xml,"
-                "application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8"
-            ),
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-        })
-        main(url, debug, download, shot, maps, force, session=session, research_folder=research_folder)
-
-import requests
\ No newline at end of file
+        session = new_session(options)
+        main(url, debug, download, shot, maps, force, session=session, research_folder=research_folder, options=options)
+
+    print_stats(pop_stats(session))
+    rcScreenshot.close_screenshots()
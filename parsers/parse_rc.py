@@ -1,17 +1,74 @@
-from bs4 import BeautifulSoup
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import sys
 import json
-import requests
 import getpass
 import os
 from common import rc_internal_research as rcMisc
-from common.rc_session import rc_session
+from common import rc_store as rcStore
+from common import rc_cli as rcCli
+from common.rc_html import make_soup
+from screenshots import screenshot as rcScreenshot
+from common.rc_session import rc_session, new_session, pop_stats, print_stats
 from parse_expo import main as parse_expo
 
+# session of the current pool worker, created once by init_worker
+worker_session = None
+
+# request counters of all sessions of this run
+run_stats = Counter()
+
+
+def init_worker(credentials, options):
+    """Create the session used by this pool worker for all of its expositions."""
+    global worker_session
+    if credentials:
+        worker_session = rc_session(*credentials, options)
+    else:
+        worker_session = new_session(options)
+
+
+def parse_worker(url, meta, parse_args):
+    expo = parse_expo(url, session=worker_session, **parse_args, **meta)
+    return expo, pop_stats(worker_session)
+
+
+def crawl(jobs, workers, session, credentials, **parse_args):
+    """
+    Parse (url, meta) jobs and yield the resulting expositions.
+
+    With workers > 1 the expositions are fanned out over a process pool,
+    each worker holding its own session. Results are yielded as they complete.
+    """
+    if workers <= 1:
+        for index, (url, meta) in enumerate(jobs):
+            print(f"Processing exposition {index + 1}/{len(jobs)}")
+            yield parse_expo(url, session=session, **parse_args, **meta)
+        return
+
+    print(f"Processing {len(jobs)} expositions with {workers} workers.")
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(credentials, parse_args["options"])) as executor:
+        futures = {executor.submit(parse_worker, url, meta, parse_args): url for url, meta in jobs}
+        for index, future in enumerate(as_completed(futures)):
+            print(f"Finished exposition {index + 1}/{len(jobs)}: {futures[future]}")
+            try:
+                expo, stats = future.result()
+                run_stats.update(stats)
+                yield expo
+            except Exception as e:
+                print(f"Failed to parse {futures[future]}: {e}")
+
+
+# options of parse_rc.py besides the crawl options shared with parse_expo.py
+FLAGS = {
+    "--workers": int,
+    **rcCli.CRAWL_FLAGS,
+}
+
 
 def print_usage():
     usage = """
-Usage: python3 parse_rc.py <debug> <download> <shot> <maps> <force> <resume> [auth] [research_folder] [lookup]
+Usage: python3 parse_rc.py <debug> <download> <shot> <maps> <force> <resume> [auth] [research_folder] [lookup] [options...]
     
 Arguments:
     <debug>           : Debug mode (1 for enabled, 0 for disabled).
@@ -24,6 +81,25 @@ Arguments:
     [research_folder] : Optional. Path to research output folder (default: ../research/)
     [lookup]          : Optional. Provide a url, will look for exposition links in that page and download only those.
 
+Options (--name value or --name=value):
+    --workers N       : Parse N expositions in parallel, each worker with its own session (default: 1).
+    --page-workers N  : Number of pages fetched concurrently within one exposition (default: 4).
+    --cache-dir PATH  : Cache RC pages on disk and revalidate them on later runs (default: <research_folder>/.http_cache when --cache-ttl is given).
+    --cache-ttl SEC   : Serve cached pages younger than SEC seconds without any request (default: 0, always revalidate).
+    --parser NAME     : HTML parser backend: html.parser (default), lxml or html5lib.
+    --partial 1       : Sniff the page type and parse only the regions that are extracted.
+    --retries N       : Retry failed connections and 429/5xx responses N times with exponential backoff (default: 3).
+    --rate N          : Send at most N requests per second in total, shared by all workers (default: unlimited).
+    --media-workers N : With <download>, number of media downloaded concurrently within one exposition (default: 4).
+    --media-store PATH: With <download>, keep every media file once in PATH and hardlink it into the exposition folders (default: <research_folder>/.media_store, "none" to disable).
+    --max-media-size MB : With <download>, skip media files larger than MB megabytes (default: no limit).
+    --browsers N      : With <shot>, number of headless browsers per worker, capturing the pages of an exposition at once (default: 1).
+    --browser-recycle N : With <shot>, replace a browser by a fresh one after N screenshots (default: 50).
+    --resize-workers N : With <shot>, processes that write the resized and compressed screenshots per worker, 0 for none (default: 2).
+    --webp 1          : With <shot>, also write a compressed WebP of every screenshot.
+    --codec NAME      : Output format of {id}.json and rc_dict / rc_advanced: json (default), zstd (compressed json) or msgpack.
+    --blobs 1         : Store raw tool html once in a compressed blob store next to each {id}.json, keep only digests inline.
+
 Examples:
     Without authentication:
         python3 parse_rc.py 1 1 0 0 0 0 ./my_research
@@ -33,11 +109,24 @@ Examples:
 
     With lookup:
         python3 parse_rc.py 1 1 0 0 0 0 auth ./secure_research lookup
+
+    With four parallel workers:
+        python3 parse_rc.py 0 0 0 0 0 0 ./my_research --workers 4
 """
     print(usage)
 
 
 if __name__ == "__main__":
+    # --- options ---
+    try:
+        values, args = rcCli.parse_flags(sys.argv[1:], FLAGS)
+    except rcCli.UsageError as e:
+        print(f"Error: {e}.")
+        print_usage()
+        sys.exit(1)
+    workers = values["--workers"] or 1
+    sys.argv = sys.argv[:1] + args
+
     if len(sys.argv) < 7:
         print("Error: Missing required arguments.")
         print_usage()
@@ -58,34 +147,18 @@ if __name__ == "__main__":
     # --- authentication & research folder handling ---
     research_folder = "../research/"  # default
     session = None
+    credentials = None
 
     if len(sys.argv) > 7 and sys.argv[7] == "auth":
         user = input("Email: ")
         password = getpass.getpass("Password: ")
-        session = rc_session(user, password)
+        credentials = (user, password)
         if len(sys.argv) > 8:
             research_folder = sys.argv[8]
             lookup_arg_index = 9
         else:
             lookup_arg_index = 8
     else:
-        session = requests.Session()
-        session.headers.update({
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/137.0.0.0 Safari/537.36"
-            ),
-            "Accept": (
-                "text/html,application/xhtml+xml,"
-                "application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8"
-            ),
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-        })
-        print("Proceeding without authentication.")
         if len(sys.argv) > 7:
             research_folder = sys.argv[7]
             lookup_arg_index = 8
@@ -96,64 +169,58 @@ if __name__ == "__main__":
     research_folder = os.path.abspath(research_folder)
     os.makedirs(research_folder, exist_ok=True)
 
+    # --- options of all sessions, parsers, writers, downloads and screenshots of this run ---
+    try:
+        run_options = rcCli.crawl_options(values, research_folder, download, workers)
+    except rcCli.UsageError as e:
+        print(f"Error: {e}.")
+        print_usage()
+        sys.exit(1)
+
+    if credentials:
+        session = rc_session(*credentials, run_options)
+    else:
+        session = new_session(run_options)
+        print("Proceeding without authentication.")
+
     # --- file paths ---
     rc_dict_path = os.path.join(research_folder, "rc_dict.json")
     advanced_research_dict_path = os.path.join(research_folder, "rc_advanced.json")
-
-    # --- load existing dicts ---
-    try:
-        with open(rc_dict_path, "r") as file:
-            rc_dict = json.load(file)
-            print("RC dict loaded.")
-    except FileNotFoundError:
-        rc_dict = {}
-        print(f"File '{rc_dict_path}' not found. New dict created.")
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON: {e}")
-        rc_dict = {}
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        rc_dict = {}
-
-    try:
-        with open(advanced_research_dict_path, "r") as file:
-            rc_advanced = json.load(file)
-            print("RC advanced dict loaded.")
-    except FileNotFoundError:
-        rc_advanced = {}
-        print(f"File '{advanced_research_dict_path}' not found. New dict created.")
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON: {e}")
-        rc_advanced = {}
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        rc_advanced = {}
+    # parsed expositions are appended to rc_dict.jsonl / rc_advanced.jsonl
+    # and compacted into the dicts above at the end of the run
+    # (logs left behind by an interrupted run are compacted first)
+    rcStore.compact(rc_dict_path, run_options.codec)
+    rcStore.compact(advanced_research_dict_path, run_options.codec)
+
+    parse_args = {
+        "debug": debug,
+        "download": download,
+        "shot": shot,
+        "maps": maps,
+        "force": force,
+        "research_folder": research_folder,
+        "options": run_options,
+    }
 
     # --- lookup mode ---
     if len(sys.argv) > lookup_arg_index:
         page_url = sys.argv[lookup_arg_index]
         print(f"Looking for research in: {page_url}")
         page = session.get(page_url)
-        soup = BeautifulSoup(page.content, 'html.parser')
+        soup = make_soup(page.content, parser=run_options.parser)
         buttons = soup.find_all('a', class_='button consult-research')
         research = [button['href'] for button in buttons]
         print(f"Found {len(research)} expositions")
 
-        for index, url in enumerate(research):
-            print(f"Processing exposition {index + 1}/{len(research)}")
-            expo = parse_expo(url, debug, download, shot, maps, force, session, research_folder=research_folder)
+        jobs = [(url, {}) for url in research]
+        for expo in crawl(jobs, workers, session, credentials, **parse_args):
             if expo:
-                rc_dict[expo["id"]] = expo
-                rc_advanced[expo["id"]] = expo["meta"]
-
-                with open(rc_dict_path, 'w') as outfile:
-                    json.dump(rc_dict, outfile, indent=2)
-                with open(advanced_research_dict_path, 'w') as outfile:
-                    json.dump(rc_advanced, outfile, indent=2)
+                rcStore.append_record(rc_dict_path, expo["id"], expo)
+                rcStore.append_record(advanced_research_dict_path, expo["id"], expo["meta"])
 
     # --- internal research mode ---
     else:
-        rcMisc.getInternalResearch(research_folder, resume)
+        rcMisc.getInternalResearch(research_folder, resume, session)
         print("Using internal research")
 
         if resume:
@@ -171,13 +238,14 @@ if __name__ == "__main__":
             research = json.load(file)
 
         print(f"Processing {len(research)} expositions.")
-        for index, exposition in enumerate(research):
-            print(f"Processing exposition {index + 1}/{len(research)}")
-            url = exposition["default-page"]
-            meta = {key: value for key, value in exposition.items()}
-            expo = parse_expo(url, debug, download, shot, maps, force, session,
-                              research_folder=research_folder, **meta)
+        jobs = [(exposition["default-page"], dict(exposition)) for exposition in research]
+        for expo in crawl(jobs, workers, session, credentials, **parse_args):
             if expo:
-                rc_dict[expo["id"]] = expo
-                with open(rc_dict_path, 'w') as outfile:
-                    json.dump(rc_dict, outfile, indent=2)
\ No newline at end of file
+                rcStore.append_record(rc_dict_path, expo["id"], expo)
+
+    rcStore.compact(rc_dict_path, run_options.codec)
+    rcStore.compact(advanced_research_dict_path, run_options.codec)
+
+    run_stats.update(pop_stats(session))
+    print_stats(run_stats)
+    rcScreenshot.close_screenshots()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Parity check between two HTML parser backends.
+
+Runs the page extraction of parse_expo over a stored HTML corpus with both
+backends and diffs the resulting page json. Meta pages in the corpus are
+also run through parse_meta_page and parse_expo.main offline, which reads
+them with extract_copyrights and getAllPages as well, and the exposition
+json (meta, copyrights, pages, hyperlinks) is diffed. The corpus is a folder
+with .html files, or an http cache folder (see common/rc_cache.py) whose
+entries also carry the url of each page; pages missing from the corpus are
+served as empty 404 responses.
+
+Usage (from parsers/):
+    python3 parser_parity.py <corpus_folder> [parser_a] [parser_b]
+
+    parser_a / parser_b default to html.parser and lxml. Append ":partial" to
+    a parser to parse only the regions the extraction needs, e.g. lxml:partial.
+"""
+
+from contextlib import redirect_stdout
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from common.rc_documents import DocumentContext
+from common.rc_options import RCOptions
+from expo.rc_soup_pages import parsePage
+from media.extract_copyrights import extract_copyrights
+from meta.parse_meta_page import parse_meta_page
+import parse_expo
+from parse_expo import extract_page
+import difflib
+import json
+import io
+import sys
+import time
+
+DEFAULT_URL = "https://www.researchcatalogue.net/view/0/0"
+META_URL = "https://www.researchcatalogue.net/profile/show-exposition?exposition=0"
+
+
+def is_meta_page(url, content):
+    return "show-exposition" in url or b"meta-headline" in content
+
+
+def load_corpus(folder):
+    """Yield (name, url, content) for every stored document in folder."""
+    for path in sorted(Path(folder).rglob("*")):
+        if path.suffix == ".html":
+            content = path.read_bytes()
+            yield path.name, META_URL if is_meta_page("", content) else DEFAULT_URL, content
+        elif path.suffix == ".body":
+            try:
+                with open(path.with_suffix(".json"), "r") as file:
+                    entry = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            yield path.stem, entry.get("final-url") or entry["url"], path.read_bytes()
+
+
+def page_json(url, content, spec):
+    """Parse content with the parser spec and return the page dict as parse_expo builds it, as json."""
+    parser, _, mode = spec.partition(":")
+    start = time.perf_counter()
+    pageType, parsed = parsePage(content, parser=parser, partial=(mode == "partial"))
+    parse_time = time.perf_counter() - start
+
+    with redirect_stdout(io.StringIO()):
+        toolsDict, toolsMetrics, hrefs, iframe_url = extract_page(url, parsed, pageType)
+    total_time = time.perf_counter() - start
+
+    page_dict = {"type": pageType}
+    if toolsDict:
+        page_dict["tools"] = toolsDict
+    if toolsMetrics:
+        page_dict["metrics"] = toolsMetrics
+    if hrefs:
+        page_dict["hyperlinks"] = hrefs
+    if iframe_url:
+        page_dict["url"] = iframe_url
+
+    return json.dumps(page_dict, indent=2, sort_keys=True, default=str), parse_time, total_time
+
+
+class CorpusSession:
+    """Offline stand-in for a session: serves the stored documents by url, anything else is an empty 404."""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def get(self, url, **kwargs):
+        content = self.documents.get(url)
+        return SimpleNamespace(url=url, status_code=404 if content is None else 200, content=content or b"")
+
+
+def exposition_json(url, session, spec):
+    """Parse the meta page at url and its exposition with the parser spec, return the exposition dict as json."""
+    parser, _, mode = spec.partition(":")
+    options = RCOptions(parser=parser, partial=(mode == "partial"))
+    with redirect_stdout(io.StringIO()), TemporaryDirectory() as research_folder:
+        documents = DocumentContext(session, options)
+        meta = parse_meta_page(url, session, documents)
+        # main keeps the copyrights only when a page has tools, which the corpus may not hold
+        exp_dict = {"meta": meta, "copyrights": extract_copyrights(url, session, documents)}
+        if meta:
+            # with the meta record given, main reads the meta page only for the copyrights and pages
+            exp_dict.update(parse_expo.main(
+                meta["default-page"] or DEFAULT_URL, 0, 0, 0, 0, 1, session=session,
+                research_folder=research_folder, options=options, **meta,
+            ))
+    return json.dumps(exp_dict, indent=2, sort_keys=True, default=str)
+
+
+def compare(name, url, results, parser_a, parser_b):
+    """Print OK or the diff of the two results, return True if they differ."""
+    if results[parser_a] == results[parser_b]:
+        print(f"OK   {name}")
+        return False
+    print(f"DIFF {name} ({url})")
+    diff = difflib.unified_diff(
+        results[parser_a].splitlines(), results[parser_b].splitlines(),
+        fromfile=parser_a, tofile=parser_b, lineterm="", n=1,
+    )
+    for line in list(diff)[:40]:
+        print(f"     {line}")
+    return True
+
+
+def main(folder, parser_a="html.parser", parser_b="lxml"):
+    corpus = list(load_corpus(folder))
+    # the .html files have no url of their own, only cache entries are served to the expositions
+    stored = {url: content for _, url, content in corpus if url not in (DEFAULT_URL, META_URL)}
+    documents = 0
+    expositions = 0
+    differences = 0
+    times = {parser_a: [0.0, 0.0], parser_b: [0.0, 0.0]}
+
+    for name, url, content in corpus:
+        documents += 1
+        results = {}
+        for parser in (parser_a, parser_b):
+            try:
+                results[parser], parse_time, total_time = page_json(url, content, parser)
+            except Exception as e:
+                results[parser] = f"error: {e}"
+                parse_time = total_time = 0.0
+            times[parser][0] += parse_time
+            times[parser][1] += total_time
+        differences += compare(name, url, results, parser_a, parser_b)
+
+        if is_meta_page(url, content):
+            expositions += 1
+            session = CorpusSession({**stored, url: content})
+            results = {}
+            for parser in (parser_a, parser_b):
+                try:
+                    results[parser] = exposition_json(url, session, parser)
+                except Exception as e:
+                    results[parser] = f"error: {e}"
+            differences += compare(f"{name} (exposition)", url, results, parser_a, parser_b)
+
+    print(f"\n{documents} documents, {expositions} expositions, {differences} with differences.")
+    for parser, (parse_time, total_time) in times.items():
+        print(f"{parser:12} parse {parse_time:.2f}s, parse + extraction {total_time:.2f}s")
+    return differences
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    sys.exit(1 if main(*sys.argv[1:4]) else 0)
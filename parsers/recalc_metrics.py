@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Recompute the metrics of every graphical page from the stored tools.
+
+Reads research/{id}/{id}.json (any codec), runs calc_metrics on the tools of
+every weave-graphical page and writes changed expositions back in place,
+in the codec they were stored in. Their records in rc_dict are updated too.
+No requests are made, so a metrics revision over the whole catalogue only
+costs local CPU time.
+
+Usage (from parsers/):
+    python3 recalc_metrics.py [research_folder] [workers]
+
+    research_folder defaults to ../research/, workers to the number of CPUs.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from common import rc_codec as rcCodec
+from common import rc_store as rcStore
+from metrics.calc_metrics import calc_metrics
+import io
+import os
+import sys
+import time
+
+
+def recalc_page(page):
+    """Recompute the metrics of a page in place, return True if they changed."""
+    with redirect_stdout(io.StringIO()):
+        metrics = calc_metrics(**page["tools"]) if page.get("tools") else None
+    if metrics == page.get("metrics") or (not metrics and "metrics" not in page):
+        return False
+    if metrics:
+        page["metrics"] = metrics
+    else:
+        page.pop("metrics", None)
+    return True
+
+
+def recalc_exposition(folder):
+    """
+    Recompute the metrics of the exposition in folder and write it back if
+    anything changed. Returns (id, changed pages, exposition or None).
+    """
+    num = os.path.basename(folder)
+    path, exp_dict = rcStore.load_exposition(folder)
+    if not path:
+        return num, 0, None
+
+    changed = 0
+    for page in exp_dict.get("pages", {}).values():
+        if page.get("type") == "weave-graphical":
+            changed += recalc_page(page)
+    if changed:
+        rcStore.rewrite_exposition(path, exp_dict)
+    return num, changed, exp_dict if changed else None
+
+
+def main(research_folder="../research/", workers=None):
+    research_folder = os.path.abspath(research_folder)
+    folders = rcStore.exposition_folders(research_folder)
+    print(f"Recomputing metrics of {len(folders)} expositions.")
+
+    rc_dict_path = os.path.join(research_folder, "rc_dict.json")
+    # rc_dict, if there is one, is rewritten in the codec it was stored in
+    existing = rcCodec.find(os.path.splitext(rc_dict_path)[0])
+
+    start = time.perf_counter()
+    updated = pages = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for num, changed, exp_dict in executor.map(recalc_exposition, folders, chunksize=16):
+            if exp_dict is not None:
+                updated += 1
+                pages += changed
+                if existing:
+                    rcStore.append_record(rc_dict_path, exp_dict.get("id", num), exp_dict)
+
+    if existing:
+        rcStore.compact(rc_dict_path, rcCodec.codec_of(existing))
+    print(f"{updated} expositions, {pages} pages updated in {time.perf_counter() - start:.1f}s.")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help"):
+        print(__doc__)
+        sys.exit(0)
+    research_folder = sys.argv[1] if len(sys.argv) > 1 else "../research/"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    main(research_folder, workers)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Render the tool maps of all graphical pages from the stored tools.
+
+Reads research/{id}/{id}.json (any codec) and draws research/{id}/maps/{page}.jpg
+or .svg for every weave-graphical page in a process pool. Pages whose tool
+geometry did not change since the last rendering are skipped, maps of the
+other format are removed. "map" entries that point to another file are
+updated in place and in rc_dict, with paths joined to research_folder as
+given, like parse_expo.py writes them; entries that name the same file
+(absolute or relative) are kept. With this, maps do not have to be drawn
+during the crawl (<maps> 0).
+
+Usage (from parsers/):
+    python3 render_maps.py [research_folder] [jpg|svg] [workers]
+
+    research_folder defaults to ../research/, the format to jpg and workers
+    to the number of CPUs.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from functools import partial
+from common import rc_codec as rcCodec
+from common import rc_store as rcStore
+from metrics.generate_tools_map import render_tools_map, MAP_FORMATS
+import io
+import os
+import sys
+import time
+
+
+def render_exposition(folder, format="jpg"):
+    """
+    Render the maps of the exposition in folder and write it back if a "map"
+    entry changed. Returns (id, rendered, skipped, exposition or None).
+    """
+    num = os.path.basename(folder)
+    path, exp_dict = rcStore.load_exposition(folder)
+    if not path:
+        return num, 0, 0, None
+
+    maps_folder = os.path.join(folder, "maps")
+    rendered = skipped = 0
+    changed = False
+    # creating the maps folder would make the exposition look freshly parsed
+    with rcStore.keep_mtime(folder):
+        for page_number, page in exp_dict.get("pages", {}).items():
+            if page.get("type") != "weave-graphical" or not page.get("tools"):
+                continue
+            with redirect_stdout(io.StringIO()):
+                map_file, drawn = render_tools_map(maps_folder, page_number, page["tools"], format)
+            rendered += drawn
+            skipped += not drawn
+            # a map drawn before in the other format is superseded
+            for other in MAP_FORMATS:
+                if other != format:
+                    try:
+                        os.remove(os.path.join(maps_folder, f"{page_number}.{other}"))
+                    except FileNotFoundError:
+                        pass
+            # the same file, whether the crawl wrote it absolute (parse_rc) or relative (parse_expo)
+            if not page.get("map") or os.path.abspath(page["map"]) != os.path.abspath(map_file):
+                page["map"] = map_file
+                changed = True
+
+        if changed:
+            rcStore.rewrite_exposition(path, exp_dict)
+    return num, rendered, skipped, exp_dict if changed else None
+
+
+def main(research_folder="../research/", format="jpg", workers=None):
+    # not made absolute: new map paths are joined to research_folder like parse_expo does
+    folders = rcStore.exposition_folders(research_folder)
+    print(f"Rendering {format} maps of {len(folders)} expositions.")
+
+    rc_dict_path = os.path.join(research_folder, "rc_dict.json")
+    # rc_dict, if there is one, is rewritten in the codec it was stored in
+    existing = rcCodec.find(os.path.splitext(rc_dict_path)[0])
+
+    start = time.perf_counter()
+    rendered = skipped = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for num, exposition_rendered, exposition_skipped, exp_dict in executor.map(
+            partial(render_exposition, format=format), folders, chunksize=16
+        ):
+            rendered += exposition_rendered
+            skipped += exposition_skipped
+            if exp_dict is not None and existing:
+                rcStore.append_record(rc_dict_path, exp_dict.get("id", num), exp_dict)
+
+    if existing:
+        rcStore.compact(rc_dict_path, rcCodec.codec_of(existing))
+
+    print(f"{rendered} maps rendered, {skipped} unchanged in {time.perf_counter() - start:.1f}s.")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help"):
+        print(__doc__)
+        sys.exit(0)
+    research_folder = sys.argv[1] if len(sys.argv) > 1 else "../research/"
+    format = sys.argv[2] if len(sys.argv) > 2 else "jpg"
+    if format not in MAP_FORMATS:
+        print(f"Error: format must be one of: {', '.join(MAP_FORMATS)}")
+        sys.exit(1)
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    main(research_folder, format, workers)
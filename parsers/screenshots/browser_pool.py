@@ -0,0 +1,112 @@
+# pool of headless browsers shared by all screenshots of a process
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+import threading
+import queue
+import time
+
+
+class BrowserPool:
+    """
+    Bounded pool of reusable Chrome instances.
+
+    At most size browsers exist at a time; browser() blocks until one is
+    free. Idle browsers are health checked before they are handed out and
+    replaced when they do not respond, and every browser is recycled after
+    recycle captures so memory leaks of long sessions do not accumulate.
+    """
+
+    def __init__(self, options, size=1, recycle=50, window_size=(1920, 1080)):
+        self.options = options
+        self.recycle = recycle
+        self.window_size = window_size
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.captures = {}  # driver -> captures taken with it
+        self.stats = {"screenshots": 0, "started": 0, "recycled": 0, "replaced": 0}
+        self.first = None
+        self.last = None
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def start(self):
+        driver = webdriver.Chrome(options=self.options)
+        self.captures[driver] = 0
+        self.count("started")
+        return driver
+
+    def quit(self, driver):
+        self.captures.pop(driver, None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def healthy(self, driver):
+        try:
+            driver.execute_script("return 1")
+            return True
+        except WebDriverException:
+            return False
+
+    @contextmanager
+    def browser(self):
+        """Borrow a browser with the default window size; it is returned to the pool afterwards."""
+        self.slots.acquire()
+        driver = None
+        try:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                pass
+            if driver is not None and not self.healthy(driver):
+                self.count("replaced")
+                self.quit(driver)
+                driver = None
+            if driver is None:
+                driver = self.start()
+            driver.set_window_size(*self.window_size)
+            self.first = self.first or time.monotonic()
+
+            try:
+                yield driver
+            except WebDriverException:
+                # the browser may be in any state, do not reuse it
+                self.count("replaced")
+                self.quit(driver)
+                driver = None
+                raise
+
+            self.count("screenshots")
+            self.last = time.monotonic()
+            self.captures[driver] += 1
+            if self.captures[driver] >= self.recycle:
+                self.count("recycled")
+                self.quit(driver)
+                driver = None
+        finally:
+            if driver is not None:
+                self.idle.put(driver)
+            self.slots.release()
+
+    def close(self):
+        """Quit all idle browsers and print the throughput of the pool."""
+        while True:
+            try:
+                self.quit(self.idle.get_nowait())
+            except queue.Empty:
+                break
+        if self.stats["screenshots"]:
+            minutes = max(self.last - self.first, 1e-6) / 60
+            print(
+                f"Screenshots: {self.stats['screenshots']} in {minutes:.1f} min "
+                f"({self.stats['screenshots'] / minutes:.1f} per minute), "
+                f"{self.stats['started']} browsers started, {self.stats['recycled']} recycled, "
+                f"{self.stats['replaced']} replaced"
+            )
+            self.stats = dict.fromkeys(self.stats, 0)
+            self.first = self.last = None
@@ -1,13 +1,21 @@
 # get all images in folder, remove alpha channel, rescale to 1920x1080, convert to jpg
 from PIL import Image
-from os import path, chdir, mkdir, listdir, makedirs, getcwd
+from os import path, listdir, makedirs
 from pathlib import Path
+import io
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+# resize() first shrinks by an integer factor with reduce() when the image is
+# more than REDUCING_GAP times the target size, then resamples with LANCZOS
+REDUCING_GAP = 3.0
+
 
 def scaleByWidth(img):
     basewidth = 1920
     wpercent = basewidth / float(img.size[0])
     hsize = int((float(img.size[1]) * float(wpercent)))
-    img = img.resize((basewidth, hsize), Image.LANCZOS)
+    img = img.resize((basewidth, hsize), Image.LANCZOS, reducing_gap=REDUCING_GAP)
     return img, basewidth, hsize
 
 
@@ -15,77 +23,64 @@ def scaleByHeight(img):
     baseheight = 1080
     hpercent = baseheight / float(img.size[1])
     wsize = int((float(img.size[0]) * float(hpercent)))
-    img = img.resize((wsize, baseheight), Image.LANCZOS)
+    img = img.resize((wsize, baseheight), Image.LANCZOS, reducing_gap=REDUCING_GAP)
     return img, wsize, baseheight
 
 
-def resizeScreenshotSimple(file):
+def openScaled(source):
+    """Open an image (path or bytes) as RGB, scaled to 1920 wide or 1080 high."""
+    img = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+    # jpegs are decoded at the smallest scale that is still large enough
+    img.draft("RGB", (1920, 1080))
+    img = img.convert("RGB")
+    if img.size[0] < img.size[1]:
+        return scaleByHeight(img)
+    return scaleByWidth(img)
+
+
+def encode(img, format="JPEG", quality=75):
+    buffer = io.BytesIO()
+    img.save(buffer, format, quality=quality)
+    return buffer.getvalue()
+
+
+def writeBytes(file, data):
+    with open(file, "wb") as output:
+        output.write(data)
+
+
+def resizeScreenshotSimple(file, png=None, webp=False):
     # input is for example 0.png 1.png etc..
-    # generates 1 resized  resized-0.jpg
-    # generates 1 compressed compressed-0.jpg
+    # generates 1 resized  resized_0.jpg
+    # generates 1 compressed compressed_0.jpg
+    # and with webp compressed_0.webp
+    # png: the screenshot as bytes, saves reading file back from disk
     file_name = path.basename(file)
     folder_path = path.dirname(file)
-    img = Image.open(file)
-    img = img.convert("RGB")
-    if img.size[0] < img.size[1]:
-        img = scaleByHeight(img)
-    else:
-        img = scaleByWidth(img)
-    #print("folder path", folder_path)
-    img[0].save(folder_path + "/resized_" + path.splitext(file_name)[0] + ".jpg")
-    img[0].save(
-        (folder_path + "/compressed_" + path.splitext(file_name)[0] + ".jpg"),
-        "JPEG",
-        quality=75,
-    )
+    stem = path.splitext(file_name)[0]
+    img = openScaled(png if png is not None else file)[0]
+    # both jpegs have the same size and quality, so they are encoded once
+    jpeg = encode(img)
+    writeBytes(folder_path + "/resized_" + stem + ".jpg", jpeg)
+    writeBytes(folder_path + "/compressed_" + stem + ".jpg", jpeg)
+    if webp:
+        writeBytes(folder_path + "/compressed_" + stem + ".webp", encode(img, "WEBP"))
 
 
 def resizeScreenshot(pathh):
+    # for every page folder in pathh: resized/{name}_{width}.jpg and compressed/{name}-compressed.jpg
     directory = Path(pathh)
-    i = 0
-    pages = []
-
-    for page in directory.iterdir():
-        if page.is_dir():
-            pages.append(page.name)
-
-    chdir(pathh)
+    pages = [page for page in directory.iterdir() if page.is_dir()]
 
     for page in pages:
-        makedirs(page, exist=True)
-        makedirs("compressed", exist=True)
-        images = []
-        for file in listdir():
-            if file.endswith(".png") or file.endswith(".jpg") or file.endswith(".jpeg"):
-                images.append(file)
-
-        for image in images:
-            i = i + 1
-            print(str(i) + "/" + str(len(images)))
+        makedirs(page / "resized", exist_ok=True)
+        makedirs(page / "compressed", exist_ok=True)
+        images = [file for file in sorted(listdir(page)) if file.lower().endswith(IMAGE_EXTENSIONS)]
+
+        for i, image in enumerate(images):
+            print(str(i + 1) + "/" + str(len(images)))
             print(image)
-            file = image
-            file_name = path.basename(file)
-            img = Image.open(file)
-            img = img.convert("RGB")
-            if img.size[0] < img.size[1]:
-                img = scaleByHeight(img)
-            else:
-                img = scaleByWidth(img)
-            img[0].save(
-                "resized/"
-                + path.splitext(file_name)[0]
-                + "_"
-                + str(img[1])
-                # + "x"
-                # + str(img[2])
-                + ".jpg"
-            )
-            img[0].save(
-                "compressed/" + path.splitext(file_name)[0] + "-compressed.jpg",
-                "JPEG",
-                quality=50,
-            )
-
-        chdir("..")
-    chdir("..")
-    chdir("..")
+            img = openScaled(str(page / image))
+            stem = path.splitext(image)[0]
+            img[0].save(page / "resized" / (stem + "_" + str(img[1]) + ".jpg"))
+            img[0].save(page / "compressed" / (stem + "-compressed.jpg"), "JPEG", quality=50)
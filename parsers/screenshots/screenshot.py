@@ -1,7 +1,16 @@
-from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import util
+from .browser_pool import BrowserPool
 from .resize import *
+from common.rc_options import RCOptions
+import threading
+import hashlib
+import atexit
+import json
+import os
+import re
 
 # 5k mac size:
 ultraHD_width = 5120
@@ -16,6 +25,70 @@ options.add_argument("--headless=new")
 options.add_argument("--hide-scrollbars")
 options.add_argument(f"window-size={fullHD_width},{fullHD_height}")
 
+# browsers of this process, started on first use (see get_browser_pool)
+browser_pool = None
+
+# the screenshots of an exposition are taken on several threads (see parse_expo.main)
+pools_lock = threading.Lock()
+
+# post-processing of screenshots, off the crawl thread
+resize_pool = None
+pending_resizes = []  # (file, future)
+
+
+def get_browser_pool(rc_options=RCOptions()):
+    """The browser pool of this process, started on first use and closed at exit."""
+    global browser_pool
+    with pools_lock:
+        if browser_pool is None:
+            browser_pool = BrowserPool(
+                options,
+                size=rc_options.browsers,
+                recycle=rc_options.browser_recycle,
+                window_size=(fullHD_width, fullHD_height),
+            )
+            atexit.register(close_screenshots)
+            # pool workers of parse_rc leave without running atexit handlers
+            util.Finalize(browser_pool, close_screenshots, exitpriority=10)
+    return browser_pool
+
+
+def report_resizes(done_only=False):
+    """Collect finished (or, with done_only=False, all) resizes and print failures."""
+    with pools_lock:
+        finished = [(file, future) for file, future in pending_resizes if not done_only or future.done()]
+        for resize in finished:
+            pending_resizes.remove(resize)
+    for file, future in finished:
+        try:
+            future.result()
+        except Exception as e:
+            print(f"Resizing screenshot {file} failed: {e}")
+
+
+def resizeInBackground(file, png, rc_options=RCOptions()):
+    """Write resized_ / compressed_ versions of the screenshot png (bytes) on the resize pool."""
+    global resize_pool
+    if not rc_options.resize_workers:
+        resizeScreenshotSimple(file, png, rc_options.webp)
+        return
+    report_resizes(done_only=True)
+    with pools_lock:
+        if resize_pool is None:
+            resize_pool = ProcessPoolExecutor(max_workers=rc_options.resize_workers)
+        pending_resizes.append((file, resize_pool.submit(resizeScreenshotSimple, file, png, rc_options.webp)))
+
+
+def close_screenshots():
+    """Quit the browsers and wait for all pending resizes."""
+    global resize_pool
+    if browser_pool is not None:
+        browser_pool.close()
+    report_resizes()
+    if resize_pool is not None:
+        resize_pool.shutdown()
+        resize_pool = None
+
 def smartScreenSize(weaveSize):
     width = weaveSize["width"]
     height = weaveSize["height"]
@@ -58,54 +131,83 @@ def smartZoom(driver):
         screen = "weave not found"
     return {"scale": scale, "size": size, "screen": screen}
 
-def saveScreenshotAndResize(driver, path):
-    driver.save_screenshot(path)  # replaced by a function that does both.
-    resizeScreenshotSimple(path)
-    
-def screenshotGraphical(url, path, num):
-    driver = webdriver.Chrome(options=options)
-    print(f"Trying screenshot of {url}")
-    driver.get(url)
-    source = driver.page_source
+# signed media urls carry an expiry and a signature that change on every fetch
+VOLATILE_PARAMS = re.compile(r"(\?|&amp;|&)(_expiration|_hash)=[^&\"'\s<>)]*")
+
+def weaveDigest(weave):
+    """
+    sha256 of the weave html, a page whose weave is unchanged looks the same.
+    The volatile parameters of signed media urls are left out.
+    """
+    return hashlib.sha256(VOLATILE_PARAMS.sub("", str(weave)).encode("utf-8")).hexdigest()
+
+def loadScreenshot(folder, num, digest):
+    """
+    The screenshot record stored next to {num}.png by the last run, if the
+    weave digest is still the same and the screenshot still exists.
+    """
     try:
-        scale = smartZoom(driver)
-        scal = scale["scale"]
-        screen = scale["screen"]
-        zoom = str(scal) + "%"
-        driver.set_window_size(screen["width"], screen["height"])
-        driver.execute_script("document.body.style.zoom='" + zoom + "'")
-        path = f"{path}/{num}.png"
-        saveScreenshotAndResize(driver, path)
-        print(f"Saved screenshot at {path}")
-    except Exception as e:
-        path = str(e)
-        zoom =  source#debug
-        print(f"screenshot failed for url: {url}. Error: {e}")
-        
-    driver.quit()
+        with open(os.path.join(folder, f"{num}.json"), "r") as file:
+            stored = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if stored.get("digest") == digest and os.path.exists(stored["screenshot"]["file"]):
+        return stored["screenshot"]
+    return None
+
+def saveScreenshot(folder, num, digest, screenshot):
+    """Store the record of a successful screenshot with the weave digest it was taken for."""
+    if os.path.exists(screenshot["file"]):
+        with open(os.path.join(folder, f"{num}.json"), "w") as file:
+            json.dump({"digest": digest, "screenshot": screenshot}, file)
+
+def saveScreenshotAndResize(driver, path, rc_options=RCOptions()):
+    # the png is written as the driver returns it, resizing starts from the same bytes
+    png = driver.get_screenshot_as_png()
+    with open(path, "wb") as file:
+        file.write(png)
+    resizeInBackground(path, png, rc_options)
+    
+def screenshotGraphical(url, path, num, rc_options=RCOptions()):
+    with get_browser_pool(rc_options).browser() as driver:
+        print(f"Trying screenshot of {url}")
+        driver.get(url)
+        source = driver.page_source
+        try:
+            scale = smartZoom(driver)
+            scal = scale["scale"]
+            screen = scale["screen"]
+            zoom = str(scal) + "%"
+            driver.set_window_size(screen["width"], screen["height"])
+            driver.execute_script("document.body.style.zoom='" + zoom + "'")
+            path = f"{path}/{num}.png"
+            saveScreenshotAndResize(driver, path, rc_options)
+            print(f"Saved screenshot at {path}")
+        except Exception as e:
+            path = str(e)
+            zoom =  source#debug
+            print(f"screenshot failed for url: {url}. Error: {e}")
         
     return {
         "file": path,
         "weave_size": zoom
     }
     
-def screenshotBlock(url, path, num):
-    driver = webdriver.Chrome(options=options)
-    print(f"Trying screenshot of {url}")
-    driver.get(url)
-    source = driver.page_source
-    try:
-        zoom = "150%"
-        driver.execute_script("document.body.style.zoom='" + zoom + "'")
-        path = f"{path}/{num}.png"
-        saveScreenshotAndResize(driver, path)
-        print(f"Saved screenshot at {path}")
-    except Exception as e:
-        path = str(e)
-        zoom =  source#debug
-        print(f"screenshot failed for url: {url}. Error: {e}")
-        
-    driver.quit()
+def screenshotBlock(url, path, num, rc_options=RCOptions()):
+    with get_browser_pool(rc_options).browser() as driver:
+        print(f"Trying screenshot of {url}")
+        driver.get(url)
+        source = driver.page_source
+        try:
+            zoom = "150%"
+            driver.execute_script("document.body.style.zoom='" + zoom + "'")
+            path = f"{path}/{num}.png"
+            saveScreenshotAndResize(driver, path, rc_options)
+            print(f"Saved screenshot at {path}")
+        except Exception as e:
+            path = str(e)
+            zoom =  source#debug
+            print(f"screenshot failed for url: {url}. Error: {e}")
         
     return {
         "file": path,
@@ -0,0 +1,5 @@
+# the parsers are scripts run from parsers/, their packages are imported from there
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,58 @@
+from contextlib import redirect_stdout
+from common import rc_blobs as rcBlobs
+from common import rc_store as rcStore
+from common.rc_options import RCOptions
+from meta.parse_meta_page import parse_meta_page
+import copy
+import io
+import os
+import parse_expo
+import parser_parity
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+META_URL = "https://www.researchcatalogue.net/profile/show-exposition?exposition=1001"
+
+
+def crawl(research_folder, options):
+    """Parse the corpus exposition into research_folder and return its stored json."""
+    session = parser_parity.CorpusSession({url: content for _, url, content in parser_parity.load_corpus(CORPUS)})
+    with redirect_stdout(io.StringIO()):
+        meta = parse_meta_page(META_URL, session)
+        parse_expo.main(meta["default-page"], 0, 0, 0, 0, 1, session=session,
+                        research_folder=str(research_folder), options=options, **meta)
+    path, exp_dict = rcStore.load_exposition(os.path.join(research_folder, "1001"))
+    return path, exp_dict
+
+
+def test_blob_store_round_trips_the_stored_exposition(tmp_path):
+    _, inline = crawl(tmp_path / "inline", RCOptions())
+    path, stored = crawl(tmp_path / "blobs", RCOptions(blobs=True))
+    folder = rcBlobs.blob_folder(os.path.dirname(path))
+
+    tools = list(rcBlobs.iter_tools(stored))
+    assert tools and all("content" not in tool and "content-blob" in tool for tool in tools)
+    assert not any(isinstance(tool.get("tool"), str) and tool["tool"].startswith("<") for tool in tools)
+    assert rcBlobs.rehydrate(stored, folder) == inline
+
+
+def test_same_html_is_stored_once(tmp_path):
+    html = '<div class="tool tool-text"><a id="tool-1"></a><div class="tool-content"><p>same</p></div></div>'
+    exp_dict = {"pages": {"1": {"tools": {"tool-text": [
+        {"id": "tool-1", "tool": html, "content": "<p>same</p>"},
+        {"id": "tool-2", "tool": html, "content": "<p>same</p>"},
+    ]}}}}
+    original = copy.deepcopy(exp_dict)
+
+    rcBlobs.store_tool_html(exp_dict, str(tmp_path))
+    blobs = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert len(blobs) == 2
+    assert rcBlobs.rehydrate(exp_dict, str(tmp_path)) == original
+
+
+def test_usage_urls_stay_inline(tmp_path):
+    # insert_copyrights replaces "tool" with the usage url of the copyright entry
+    tool = {"id": "tool-1", "tool": "/view/1/2#tool-1", "content": "<img src='a.jpg'>"}
+    exp_dict = {"pages": {"2": {"tools": {"tool-picture": [tool]}}}}
+    rcBlobs.store_tool_html(exp_dict, str(tmp_path))
+    assert tool["tool"] == "/view/1/2#tool-1" and "content-blob" in tool
+    assert rcBlobs.load_tool_html(tool, str(tmp_path))["content"] == "<img src='a.jpg'>"
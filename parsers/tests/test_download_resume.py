@@ -0,0 +1,82 @@
+import requests
+from common.rc_options import RCOptions
+from media.rc_merge_data import download_media
+from parse_expo import clear_exposition_folder
+
+URL = "https://media.researchcatalogue.net/rc/master/35/b8/35b87a4a3245bf226642e5ea25565179.mp4?_expiration=1700000000&_hash=abc"
+BODY = bytes(range(256)) * 40
+
+
+class Response:
+    def __init__(self, status_code, body, broken=False):
+        self.status_code = status_code
+        self.headers = {"Content-Length": str(len(body)), "Content-Type": "video/mp4"}
+        self.body = body
+        self.broken = broken
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        yield self.body[:len(self.body) // 2]
+        if self.broken:
+            raise requests.exceptions.ChunkedEncodingError("connection reset")
+        yield self.body[len(self.body) // 2:]
+
+
+class Session:
+    """Serves BODY, honours Range requests; the first transfer breaks off halfway."""
+
+    def __init__(self, broken):
+        self.broken = broken
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        headers = headers or {}
+        self.requests.append(headers)
+        if "Range" in headers:
+            offset = int(headers["Range"].split("=")[1].rstrip("-"))
+            return Response(206, BODY[offset:], self.broken)
+        return Response(200, BODY, self.broken)
+
+
+def test_interrupted_download_is_resumed_in_the_next_run(tmp_path):
+    media = tmp_path / "media"
+    media.mkdir()
+    (tmp_path / "123.json").write_text("{}")
+    (media / "old.mp4").write_bytes(b"old")
+    folder = f"{media}/"
+    options = RCOptions(media_attempts=1)
+
+    assert download_media(Session(broken=True), URL, folder, "tool-1", options) is False
+    parts = [path.name for path in media.iterdir() if path.suffix == ".part"]
+    assert len(parts) == 1
+
+    # parse_expo clears the folder of an exposition it parses again
+    clear_exposition_folder(str(tmp_path))
+    assert sorted(path.name for path in media.iterdir()) == parts
+
+    session = Session(broken=False)
+    path = download_media(session, URL, folder, "tool-1", options)
+    assert session.requests[0]["Range"] == f"bytes={len(BODY) // 2}-"
+    assert path == f"{folder}tool-1.mp4"
+    with open(path, "rb") as file:
+        assert file.read() == BODY
+    assert [path.name for path in media.iterdir()] == ["tool-1.mp4"]
+
+
+def test_part_file_of_other_media_is_not_resumed(tmp_path):
+    folder = f"{tmp_path}/"
+    options = RCOptions(media_attempts=1)
+    download_media(Session(broken=True), URL, folder, "tool-1", options)
+
+    session = Session(broken=False)
+    other = URL.replace("35b87a4a3245bf226642e5ea25565179", "0" * 32)
+    path = download_media(session, other, folder, "tool-1", options)
+    assert "Range" not in session.requests[0]
+    with open(path, "rb") as file:
+        assert file.read() == BODY
+    assert [path.name for path in tmp_path.iterdir()] == ["tool-1.mp4"]
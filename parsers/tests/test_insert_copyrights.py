@@ -0,0 +1,134 @@
+from benchmarks.bench_copyright_matching import copyrights, exposition, legacy_insert
+from media.rc_merge_data import insert_copyrights
+import copy
+import os
+import random
+
+MEDIA = "https://media.researchcatalogue.net/rc/master/{}.jpg"
+
+
+class Response:
+    def __init__(self, status_code, body=b""):
+        self.status_code = status_code
+        self.headers = {"Content-Length": str(len(body)), "Content-Type": "image/jpeg"}
+        self.body = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+
+class Session:
+    """Serves every media url except the missing ones, and counts the requests."""
+
+    def __init__(self, missing=()):
+        self.missing = missing
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append(url)
+        if url in self.missing:
+            return Response(404)
+        return Response(200, url.encode())
+
+
+def entry(*tool_ids):
+    return {
+        "id": list(tool_ids),
+        "tool": [f"https://www.researchcatalogue.net/view/1/2#{tool_id}" for tool_id in tool_ids],
+        "copyright": "Ada Example",
+    }
+
+
+def page(category, *tools):
+    return {"tools": {category: list(tools)}}
+
+
+def read(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def test_media_used_by_several_tools_is_downloaded_once(tmp_path):
+    folder = f"{tmp_path}/"
+    exposition = {
+        "2": page("tool-picture", {"id": "tool-1", "src": MEDIA.format("a")}),
+        "3": page("tool-picture", {"id": "tool-2", "src": MEDIA.format("a")}, {"id": "tool-3", "src": MEDIA.format("a")}),
+    }
+    session = Session()
+    insert_copyrights([entry("tool-1", "tool-2", "tool-3")], exposition, session, folder)
+
+    tools = [tool for page_data in exposition.values() for tool in page_data["tools"]["tool-picture"]]
+    assert session.requests == [MEDIA.format("a")]
+    assert [tool["path"] for tool in tools] == [f"{folder}tool-1.jpg"] * 3
+    assert [tool["tool"] for tool in tools] == [f"https://www.researchcatalogue.net/view/1/2#tool-{i}" for i in (1, 2, 3)]
+    assert read(f"{folder}tool-1.jpg") == MEDIA.format("a").encode()
+
+
+def test_tools_before_the_first_usage_get_its_path(tmp_path):
+    # the serial downloads gave None to tool-1, which comes before tool-2, the first usage of the media
+    folder = f"{tmp_path}/"
+    exposition = {
+        "2": page("tool-picture", {"id": "tool-1", "src": MEDIA.format("a")}),
+        "3": page("tool-picture", {"id": "tool-2", "src": MEDIA.format("a")}),
+    }
+    insert_copyrights([entry("tool-2", "tool-1")], exposition, Session(), folder)
+    assert exposition["2"]["tools"]["tool-picture"][0]["path"] == f"{folder}tool-2.jpg"
+    assert exposition["3"]["tools"]["tool-picture"][0]["path"] == f"{folder}tool-2.jpg"
+
+
+def test_media_whose_first_usage_is_missing_is_not_downloaded(tmp_path):
+    exposition = {"2": page("tool-picture", {"id": "tool-2", "src": MEDIA.format("a")})}
+    session = Session()
+    insert_copyrights([entry("tool-1", "tool-2")], exposition, session, f"{tmp_path}/")
+    assert session.requests == []
+    assert exposition["2"]["tools"]["tool-picture"][0]["path"] is None
+
+
+def test_slideshow_frames_are_shared_by_the_usages(tmp_path):
+    folder = f"{tmp_path}/"
+    frames = [MEDIA.format("f0"), MEDIA.format("f1")]
+    exposition = {
+        "2": page("tool-slideshow", {"id": "tool-5", "src": list(frames)}),
+        "3": page("tool-slideshow", {"id": "tool-6", "src": list(frames)}),
+    }
+    session = Session()
+    insert_copyrights([entry("tool-5", "tool-6")], exposition, session, folder)
+
+    expected = [f"{folder}tool-5_0.jpg", f"{folder}tool-5_1.jpg"]
+    assert sorted(session.requests) == frames
+    assert exposition["2"]["tools"]["tool-slideshow"][0]["paths"] == expected
+    assert exposition["3"]["tools"]["tool-slideshow"][0]["paths"] == expected
+
+
+def test_failed_download_gives_false(tmp_path):
+    exposition = {"2": page("tool-video", {"id": "tool-1", "src": MEDIA.format("gone")})}
+    insert_copyrights([entry("tool-1")], exposition, Session(missing=(MEDIA.format("gone"),)), f"{tmp_path}/")
+    assert exposition["2"]["tools"]["tool-video"][0]["path"] is False
+    assert os.listdir(tmp_path) == []
+
+
+def test_nothing_is_downloaded_without_download(tmp_path):
+    exposition = {"2": page("tool-picture", {"id": "tool-1", "src": MEDIA.format("a")})}
+    session = Session()
+    insert_copyrights([entry("tool-1")], exposition, session, f"{tmp_path}/", download=False)
+    tool = exposition["2"]["tools"]["tool-picture"][0]
+    assert session.requests == [] and "path" not in tool
+    assert tool["copyright"] == "Ada Example"
+
+
+def test_index_matching_gives_the_nested_scan_result():
+    random.seed(0)
+    pages, rows = exposition(2000), copyrights(2000)
+    # a tool listed twice in one entry and in two entries
+    rows[0]["id"].append(rows[0]["id"][0])
+    rows[0]["tool"].append(rows[0]["tool"][0])
+    rows[1]["id"].append(rows[0]["id"][1])
+    rows[1]["tool"].append(rows[0]["tool"][1])
+    expected = legacy_insert(rows, copy.deepcopy(pages))
+    assert insert_copyrights(rows, copy.deepcopy(pages), None, None, download=False) == expected
@@ -0,0 +1,25 @@
+from media.rc_media_store import media_key
+
+HASH = "35b87a4a3245bf226642e5ea25565179"
+
+
+def test_key_of_cache_url_is_its_file_name():
+    url = f"https://media.researchcatalogue.net/rc/cache/35/b8/7a/4a/{HASH}_199x159.png?_expiration=1700000000&_hash=abc"
+    assert media_key(url) == f"rc-{HASH}_199x159"
+
+
+def test_key_of_generate_url_is_found_in_a_middle_segment():
+    url = f"https://www.researchcatalogue.net/resources/generate/{HASH}/199/159?_expiration=1700000000&_hash=abc"
+    assert media_key(url) == f"rc-{HASH}_199x159"
+    assert media_key(f"/resources/generate/{HASH}/800/600") == f"rc-{HASH}_800x600"
+
+
+def test_rendition_after_the_hash_is_part_of_the_key():
+    assert media_key(f"https://media.researchcatalogue.net/rc/master/35/b8/{HASH}.mp4") == f"rc-{HASH}"
+    assert media_key(f"https://example.org/{HASH}/small.jpg") == f"rc-{HASH}-small"
+    assert media_key(f"https://example.org/{HASH}/small.jpg") != media_key(f"https://example.org/{HASH}/large.jpg")
+
+
+def test_other_urls_have_no_key():
+    assert media_key("https://example.org/media/picture.jpg") is None
+    assert media_key(f"https://example.org/{HASH[:20]}/picture.jpg") is None
@@ -0,0 +1,71 @@
+import os
+import random
+import numpy as np
+import pytest
+from benchmarks.bench_metrics import grid_layout, legacy_overlap, legacy_white_space, scattered_layout
+from common.rc_html import make_soup
+from expo import rc_soup_parsers as rcParsers
+from metrics.calc_metrics import (
+    calc_metrics, calculate_overlap_percentage, calculate_total_area, calculate_total_overlap,
+    calculate_union_area, calculate_white_space, extract_rectangles,
+)
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def corpus_rectangles():
+    with open(os.path.join(CORPUS, "graphical.body"), "rb") as file:
+        return extract_rectangles(**rcParsers.parse_graphical(make_soup(file.read())))
+
+
+def raster_union(rectangles):
+    """Covered area of integer rectangles, counted cell by cell."""
+    width = max(x + w for x, y, w, h in rectangles)
+    height = max(y + h for x, y, w, h in rectangles)
+    grid = np.zeros((height, width), dtype=bool)
+    for x, y, w, h in rectangles:
+        grid[y:y + h, x:x + w] = True
+    return int(grid.sum())
+
+
+def layouts():
+    random.seed(0)
+    return {
+        "scattered": scattered_layout(1000),
+        "grid": grid_layout(1000),
+        "identical": [[10, 10, 100, 50]] * 5,
+        "touching": [[0, 0, 100, 100], [100, 0, 100, 100], [0, 100, 200, 10]],
+        "nested": [[0, 0, 400, 400], [50, 50, 100, 100], [60, 60, 10, 10]],
+        "empty sizes": [[0, 0, 0, 0], [5, 5, 0, 10], [0, 0, 20, 20]],
+        "corpus": corpus_rectangles(),
+    }
+
+
+@pytest.mark.parametrize("name, rectangles", layouts().items())
+def test_overlap_is_the_pairwise_sum(name, rectangles):
+    assert calculate_total_overlap(rectangles) == pytest.approx(legacy_overlap(rectangles), rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.parametrize("name", ["grid", "touching"])
+def test_white_space_without_overlap_is_the_old_formula(name):
+    rectangles = layouts()[name]
+    assert legacy_overlap(rectangles) == 0
+    assert calculate_white_space(rectangles) == pytest.approx(legacy_white_space(rectangles), abs=1e-9)
+
+
+def test_union_counts_overlapping_tools_once():
+    random.seed(1)
+    rectangles = [[random.randint(0, 300), random.randint(0, 300), random.randint(1, 120), random.randint(1, 120)] for _ in range(60)]
+    assert calculate_union_area(rectangles) == raster_union(rectangles)
+    assert calculate_union_area(rectangles) < calculate_total_area(rectangles)
+    assert calculate_white_space(rectangles) > legacy_white_space(rectangles)
+
+
+def test_metrics_of_the_corpus_page():
+    rectangles = corpus_rectangles()
+    with open(os.path.join(CORPUS, "graphical.body"), "rb") as file:
+        metrics = calc_metrics(**rcParsers.parse_graphical(make_soup(file.read())))
+    assert len(rectangles) == 9
+    assert calculate_union_area(rectangles) == raster_union(rectangles)
+    assert metrics["overlap_percentage"] == calculate_overlap_percentage(rectangles)
+    assert metrics["overlap_percentage"] == pytest.approx(legacy_overlap(rectangles) / calculate_total_area(rectangles) * 100)
@@ -0,0 +1,48 @@
+import json
+import os
+import pytest
+import parser_parity
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+META_URL = "https://www.researchcatalogue.net/profile/show-exposition?exposition=1001"
+SPECS = [
+    ("html.parser", "lxml"),
+    ("html.parser", "html.parser:partial"),
+    ("lxml", "lxml:partial"),
+]
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return list(parser_parity.load_corpus(CORPUS))
+
+
+@pytest.fixture(scope="module")
+def session(corpus):
+    return parser_parity.CorpusSession({url: content for _, url, content in corpus})
+
+
+@pytest.mark.parametrize("spec_a, spec_b", SPECS)
+def test_page_json_is_the_same(corpus, spec_a, spec_b):
+    for name, url, content in corpus:
+        assert parser_parity.page_json(url, content, spec_a)[0] == parser_parity.page_json(url, content, spec_b)[0], name
+
+
+@pytest.mark.parametrize("spec_a, spec_b", SPECS)
+def test_exposition_json_is_the_same(session, spec_a, spec_b):
+    assert parser_parity.exposition_json(META_URL, session, spec_a) == parser_parity.exposition_json(META_URL, session, spec_b)
+
+
+def test_exposition_json_covers_the_corpus(session):
+    exp_dict = json.loads(parser_parity.exposition_json(META_URL, session, "html.parser"))
+
+    assert exp_dict["meta"]["title"] == "Listening to Rooms"
+    assert exp_dict["meta"]["author"] == {"id": 2101, "name": "Ada Example"}
+    assert {page_id: page["type"] for page_id, page in exp_dict["pages"].items()} == {
+        "1002": "weave-graphical", "1003": "weave-block", "1004": "iframe",
+    }
+    assert [entry["name"] for entry in exp_dict["copyrights"]] == ["hall.jpg", "recording.mp4", "score.pdf"]
+    assert exp_dict["hyperlinks"]["external"] == ["https://www.example.org/acoustics"]
+    # the popover tools of the graphical page are outside #container-weave
+    tool_ids = [tool["id"] for tools in exp_dict["pages"]["1002"]["tools"].values() for tool in tools]
+    assert "tool-3001" in tool_ids and "tool-3900" not in tool_ids
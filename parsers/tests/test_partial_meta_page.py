@@ -0,0 +1,42 @@
+import pytest
+from types import SimpleNamespace
+from common.rc_documents import DocumentContext
+from common.rc_options import RCOptions
+
+URL = "https://www.researchcatalogue.net/profile/show-exposition?exposition=123"
+META_PAGE = b"""
+<html><head><script>var config = {};</script></head><body>
+<div class="navigation"><ul><li>Search</li><li>Log in</li></ul></div>
+<h2 class="meta-headline">Title</h2>
+<div class="meta-right-col"><table class="meta-table"><tr><th>type</th><td>exposition</td></tr></table></div>
+<a href="/view/123/456">page</a>
+<div class="footer"><p>Research Catalogue</p></div>
+</body></html>
+"""
+
+
+class Session:
+    def get(self, url):
+        return SimpleNamespace(status_code=200, content=META_PAGE)
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+def test_meta_page_tree_is_pruned_with_partial_parsing(parser):
+    full = DocumentContext(Session(), RCOptions(parser=parser)).soup(URL)
+    partial = DocumentContext(Session(), RCOptions(parser=parser, partial=True)).soup(URL)
+
+    assert full.find(class_="navigation") and full.find("script")
+    assert partial.find(class_="navigation") is None and partial.find("script") is None
+    assert partial.find("h2", class_="meta-headline").get_text() == "Title"
+    assert partial.find("table", class_="meta-table") is not None
+    assert partial.find("a")["href"] == "/view/123/456"
+
+
+def test_lxml_shares_the_pruned_tree_with_the_copyrights():
+    documents = DocumentContext(Session(), RCOptions(parser="lxml", partial=True))
+    assert documents.soup(URL, repair=True) is documents.soup(URL)
+
+
+def test_partial_parsing_is_refused_with_html5lib():
+    with pytest.raises(ValueError):
+        RCOptions(parser="html5lib", partial=True)
@@ -0,0 +1,55 @@
+import os
+import random
+import pytest
+from benchmarks.bench_tool_extraction import block_page, graphical_page, legacy_block, legacy_graphical
+from common.rc_html import make_soup
+from expo import rc_soup_parsers as rcParsers
+from expo.rc_soup_tools import getWeave
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def page(name, parser="html.parser"):
+    with open(os.path.join(CORPUS, f"{name}.body"), "rb") as file:
+        return make_soup(file.read(), parser=parser)
+
+
+def tool_ids(tools_dict):
+    return {tool["id"] for tools in tools_dict.values() for tool in tools}
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+def test_graphical_page_gives_the_per_type_tools_of_the_weave(parser):
+    parsed = page("graphical", parser)
+    tools_dict = rcParsers.parse_graphical(parsed)
+    assert tools_dict == legacy_graphical(getWeave(parsed))
+    assert set(tools_dict) == {
+        "tool-text", "tool-simpletext", "tool-picture", "tool-video",
+        "tool-audio", "tool-slideshow", "tool-shape", "tool-embed",
+    }
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+def test_block_page_gives_the_per_type_tools_of_the_weave(parser):
+    parsed = page("block", parser)
+    tools_dict = rcParsers.parse_block(parsed)
+    assert tools_dict == legacy_block(getWeave(parsed))
+    assert tools_dict["tool-pdf"][0]["dimensions"] == "50.0%"
+    assert tools_dict["tool-pdf"][0]["row"] == 1
+
+
+def test_tools_outside_the_weave_are_left_out():
+    parsed = page("graphical")
+    # the popover tools follow #container-weave, the per-type extraction over the whole page took them in
+    assert {"tool-3900", "tool-3901"} <= tool_ids(legacy_graphical(parsed))
+    assert not {"tool-3900", "tool-3901"} & tool_ids(rcParsers.parse_graphical(parsed))
+
+
+@pytest.mark.parametrize("layout, single, legacy", [
+    (graphical_page, rcParsers.parse_graphical, legacy_graphical),
+    (block_page, rcParsers.parse_block, legacy_block),
+])
+def test_large_weaves_give_the_per_type_tools(layout, single, legacy):
+    random.seed(0)
+    parsed = make_soup(layout(500))
+    assert single(parsed) == legacy(parsed)
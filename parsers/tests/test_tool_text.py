@@ -0,0 +1,43 @@
+import os
+import pytest
+from common.rc_html import make_soup
+from expo.rc_soup_tools import TEXTTOOLS, getContent, getPlainText, removeStyle
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+SNIPPETS = [
+    "<p>Plain <b>bold</b> and <i>italic</i> text</p>",
+    "<p>Before</p><style>p { color: red; }</style><script>alert('x');</script><p>after</p>",
+    "<p>Nested <span>script <script>var a = '<b>';</script>inside</span> a span</p>",
+    "<p>Entities: &amp; &lt;tag&gt; &nbsp;spaces&#8203;</p>",
+    "<p>A comment <!-- not text --> is left out</p>",
+    "<p><ruby>漢<rp>(</rp><rt>kan</rt><rp>)</rp></ruby> and <template><b>hidden</b></template> end</p>",
+    "<p>Line<br>break</p>\n\n<ul><li>one</li><li>two</li></ul>",
+    "",
+]
+
+
+def text_tool_contents(name, parser):
+    with open(os.path.join(CORPUS, f"{name}.body"), "rb") as file:
+        parsed = make_soup(file.read(), parser=parser)
+    return [getContent(tool) for tool in parsed.find_all(class_=TEXTTOOLS)]
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+@pytest.mark.parametrize("name", ["graphical", "block"])
+def test_text_of_corpus_tools_is_the_reparsed_text(name, parser):
+    contents = text_tool_contents(name, parser)
+    assert contents
+    for content in contents:
+        assert getPlainText(content) == removeStyle(str(content))
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+@pytest.mark.parametrize("snippet", SNIPPETS)
+def test_text_of_snippet_is_the_reparsed_text(snippet, parser):
+    content = make_soup(f'<div class="tool-content">{snippet}</div>', parser=parser).find("div")
+    assert getPlainText(content) == removeStyle(str(content))
+
+
+def test_text_of_missing_content_is_the_reparsed_text():
+    assert getPlainText(None) == removeStyle(str(None))
@@ -0,0 +1,27 @@
+from common.rc_html import make_soup
+from expo.rc_soup_tools import getWeave
+from screenshots.screenshot import weaveDigest
+
+WEAVE = """
+<html class="weave-graphical"><body><div id="container-weave"><div id="weave">
+<div class="tool-picture" data-id="1" style="left: 10px; top: 20px; width: 200px; height: 100px;">
+<img src="/resources/generate/35b87a4a3245bf226642e5ea25565179/199/159?_expiration={expiration}&_hash={hash}"/>
+</div>
+<div class="tool-video" data-id="2" style="background-image: url(https://media.researchcatalogue.net/rc/cache/35/b8/7a/4a/35b87a4a3245bf226642e5ea25565179.png?_hash={hash}&_expiration={expiration})">
+<a href="https://media.researchcatalogue.net/rc/master/35/b8/video.mp4?w=640&_expiration={expiration}&_hash={hash}">{text}</a>
+</div>
+</div></div></body></html>
+"""
+
+
+def digest(**values):
+    page = make_soup(WEAVE.format(**{"expiration": "1700000000", "hash": "abc", "text": "video", **values}))
+    return weaveDigest(getWeave(page))
+
+
+def test_signed_url_parameters_do_not_change_the_digest():
+    assert digest() == digest(expiration="1800000000", hash="9f8e7d6c5b4a")
+
+
+def test_weave_content_changes_the_digest():
+    assert digest() != digest(text="another video")